@@ -56,6 +56,9 @@ sudo service apache2 restart
 # install requirements
 sudo python3.6 -m pip install -r requirements.txt --upgrade
 
+# download NLTK models, the bot itself does not download anything
+(cd ${PATH_TO_SCRIPT} && python3.6 download_nltk_data.py)
+
 # kill process if running
 [ -f pid ] && kill `cat pid`
 
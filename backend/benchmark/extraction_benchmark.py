@@ -0,0 +1,211 @@
+"""
+Latency, throughput and accuracy of name extraction and matching in backend.waldur.nameparser.
+Queries are the HELP texts of requests with placeholders replaced by generated organisation, project and VM names,
+labelled with the names they contain. Results can be saved as JSON to compare runs over time.
+Run from project root: python -m backend.benchmark.extraction_benchmark [--queries N] [--seed N] [--output file.json]
+"""
+import argparse
+import json
+import logging
+import platform
+import random
+import re
+from datetime import datetime
+from time import perf_counter
+
+import numpy as np
+
+from backend.waldur import nameparser
+from backend.waldur.logic.requests import all_subclasses
+from backend.waldur.nltk_resources import load_nltk, MissingNLTKDataError
+
+placeholder_regex = re.compile(r"\\?<(org_name|organisation name|p_name|vm_name)>")
+kinds = {'org_name': 'organisation', 'organisation name': 'organisation', 'p_name': 'project', 'vm_name': 'vm'}
+
+# Words names are generated from, per kind
+words = {
+    'organisation': ["Waldur", "Chatbot", "ETAIS", "OpenStack", "University", "Tartu", "Alpha", "Beta", "HPC", "Lab"],
+    'project': ["Testbed", "Web", "Research", "Cloud", "Genome", "Data", "Pipeline", "2018", "Demo", "Prod"],
+    'vm': ["WebServer", "DB", "Worker", "Node", "Cache", "Api", "GPU", "Build", "Ubuntu", "Centos"],
+}
+names_per_kind = 200
+
+
+def generate_names(rng, kind):
+    """
+    :return: sorted list of names_per_kind distinct names of kind, one to three words, some with a number
+    """
+    names = set()
+    while len(names) < names_per_kind:
+        name = " ".join(rng.sample(words[kind], rng.randint(1, 3)))
+        if rng.random() < 0.5:
+            name += str(rng.randint(1, 99))
+        names.add(name)
+    return sorted(names)
+
+
+def generate_queries(rng, count, names):
+    """
+    :param names: {kind: list of names, ...}
+    :return: [{'query': query, 'names': [(kind, name), ...]}, ...] of count queries from HELP texts
+    """
+    templates = sorted({request.HELP for request in all_subclasses() if request.HELP})
+    queries = []
+    for _ in range(count):
+        labels = []
+
+        def replace(match):
+            kind = kinds[match.group(1)]
+            name = rng.choice(names[kind])
+            labels.append((kind, name))
+            return name
+
+        queries.append({'query': placeholder_regex.sub(replace, rng.choice(templates)), 'names': labels})
+    return queries
+
+
+def measure(function, queries):
+    """
+    :param function: function(query) -> result, called once per query with an empty extraction cache
+    :return: (list of results, list of seconds per call)
+    """
+    # loads models and builds indexes outside of the measured calls
+    function(queries[0])
+
+    results = []
+    latencies = []
+    for query in queries:
+        nameparser.extraction_cache.clear()
+        start = perf_counter()
+        results.append(function(query))
+        latencies.append(perf_counter() - start)
+    return results, latencies
+
+
+def summary(latencies):
+    """
+    :return: {'p50_ms': ..., 'p90_ms': ..., 'p99_ms': ..., 'max_ms': ..., 'queries_per_s': ...}
+    """
+    latencies = np.array(latencies) * 1000
+    return {
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p90_ms': float(np.percentile(latencies, 90)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'max_ms': float(latencies.max()),
+        'queries_per_s': float(len(latencies) / latencies.sum() * 1000),
+    }
+
+
+def extraction_accuracy(queries, results):
+    """
+    :return: {'exact': share of queries with exactly the labelled names extracted, 'precision': ..., 'recall': ...}
+    """
+    exact = true_positives = extracted = expected = 0
+    for query, names in zip(queries, results):
+        labels = [name for _, name in query['names']]
+        names = names or []
+        exact += sorted(names) == sorted(labels)
+        true_positives += sum(name in labels for name in names)
+        extracted += len(names)
+        expected += len(labels)
+    return {
+        'exact': exact / len(queries),
+        'precision': true_positives / extracted if extracted else 1.0,
+        'recall': true_positives / expected if expected else 1.0,
+    }
+
+
+def benchmark_extraction(queries, names):
+    """
+    :return: {function: {latency and accuracy}, ...} for every way of extracting names
+    """
+    def with_known_names(query):
+        # known names of the kind of the first placeholder, as request handlers pass them
+        return nameparser.extract_names(query['query'], names[query['names'][0][0]] if query['names'] else None)
+
+    functions = [
+        ('extract_names_regex', None, lambda query: nameparser.extract_names_regex(query['query'])),
+        ('extract_names, known names', 'nltk', with_known_names),
+    ] + [
+        (f"extract_names, {engine}", engine, lambda query: nameparser.extract_names(query['query']))
+        for engine in nameparser.name_extractors
+    ]
+
+    results = {}
+    extracted = {}
+    for name, engine, function in functions:
+        if engine is not None:
+            nameparser.set_name_extractor(engine)
+        try:
+            outputs, latencies = measure(function, queries)
+        except MissingNLTKDataError as e:
+            print(f"Skipping {name}: {e}")
+            continue
+        extracted[name] = outputs
+        results[name] = dict(summary(latencies), **extraction_accuracy(queries, outputs))
+    nameparser.set_name_extractor('nltk')
+    return results, extracted
+
+
+def benchmark_matching(queries, names, extracted):
+    """
+    :param extracted: names extracted from every query, by extract_names_regex
+    :return: {'getSimilarNames, engine': {latency and accuracy}, ...} for every engine
+    """
+    labelled = [(query, found) for query, found in zip(queries, extracted) if query['names']]
+    inputs = [(found or [], names[query['names'][0][0]]) for query, found in labelled]
+    expected = [query['names'][0][1] for query, _ in labelled]
+
+    results = {}
+    for engine in nameparser.name_matchers:
+        nameparser.set_name_matcher(engine)
+        # build indexes of the name lists before timing, as they are reused between requests
+        for kind_names in names.values():
+            nameparser.name_matchers[engine](kind_names)
+        outputs, latencies = measure(lambda args: nameparser.getSimilarNames(*args), inputs)
+        accuracy = sum(output == name for output, name in zip(outputs, expected)) / len(expected)
+        results[f"getSimilarNames, {engine}"] = dict(summary(latencies), accuracy=accuracy)
+    nameparser.set_name_matcher('trigram')
+    return results
+
+
+def report(results):
+    columns = ['p50_ms', 'p90_ms', 'p99_ms', 'queries_per_s', 'exact', 'precision', 'recall', 'accuracy']
+    print(f"{'':<32}" + "".join(f"{column:>14}" for column in columns))
+    for name, result in results.items():
+        print(f"{name:<32}" + "".join(
+            f"{result[column]:>14.3f}" if column in result else f"{'':>14}" for column in columns
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--queries', type=int, default=500, help="number of queries")
+    parser.add_argument('--seed', type=int, default=1, help="seed of the generated names and queries")
+    parser.add_argument('--output', help="file to save results to as JSON")
+    args = parser.parse_args()
+
+    logging.disable(logging.ERROR)
+    rng = random.Random(args.seed)
+    names = {kind: generate_names(rng, kind) for kind in words}
+    queries = generate_queries(rng, args.queries, names)
+
+    results, extracted = benchmark_extraction(queries, names)
+    results.update(benchmark_matching(queries, names, extracted['extract_names_regex']))
+    report(results)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({
+                'time': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'nltk': load_nltk().__version__,
+                'queries': args.queries,
+                'seed': args.seed,
+                'results': results,
+            }, file, indent=2)
+        print(f"Results saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Compares throughput of the intent matchers in backend.waldur.waldur.matchers.
+Run from project root: python -m backend.benchmark.intents_benchmark [repeats]
+"""
+import logging
+import sys
+from os import path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from backend.waldur.vectors import VectorScorer
+from backend.waldur.waldur import init_bot, train_bot, matchers
+
+queries = [
+    "my projects",
+    "What virtual machines do I have?",
+    "Please give me my organisations",
+    "What organisations am I part of",
+    "What services does my organisation use",
+    "give me my total costs",
+    "my vms in project of organisation",
+    "Can you show me which virtual machines is my organisation using?",
+    "Could you list all my private clouds in project of organisation?",
+    "my privte clouds",
+    "hello",
+    "Who are you",
+    "asdkjh qwe",
+]
+
+
+def timed(function, repeats):
+    start = perf_counter()
+    for _ in range(repeats):
+        function()
+    return perf_counter() - start
+
+
+def report(name, seconds, count):
+    print(f"{name:<24}{count / seconds:>10.1f} queries/s{seconds / count * 1000:>10.3f} ms/query")
+
+
+def main(repeats=20):
+    logging.disable(logging.INFO)
+
+    with TemporaryDirectory() as directory:
+        database = path.join(directory, 'benchmark.sqlite3')
+        train_bot(init_bot(database=database))
+
+        count = repeats * len(queries)
+        responses = {}
+        for matcher in matchers:
+            bot = init_bot(matcher=matcher, database=database)
+            bot.read_only = True
+            responses[matcher] = [str(bot.get_response(query)) for query in queries]
+            report(matcher, timed(lambda: [bot.get_response(query) for query in queries], repeats), count)
+
+        bot = init_bot(database=database)
+        scorer = VectorScorer(bot.intent_index.load(bot.storage))
+        scorer.build()
+        report("vector, one by one", timed(lambda: [scorer.match(query) for query in queries], repeats), count)
+        report("vector, batched", timed(lambda: scorer.match_batch(queries * repeats), 1), count)
+
+        for matcher in matchers:
+            if matcher == 'bestmatch':
+                continue
+            agreement = sum(a == b for a, b in zip(responses[matcher], responses['bestmatch']))
+            print(f"{matcher} agrees with bestmatch on {agreement}/{len(queries)} queries")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
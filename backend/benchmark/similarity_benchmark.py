@@ -0,0 +1,88 @@
+"""
+Compares the engines of nameparser.getSimilarNames to scoring every name with difflib, as getSimilarNames used to.
+Run from project root: python -m backend.benchmark.similarity_benchmark [queries] [seed]
+"""
+import difflib
+import logging
+import random
+import string
+import sys
+from time import perf_counter
+
+from backend.waldur.similarity import NameIndex, VectorNameMatcher, SIMILARITY_FLOOR
+
+words = ["web", "db", "prod", "test", "alpha", "beta", "worker", "node", "cache", "api", "etais", "hpc", "gpu"]
+sizes = [100, 1000, 10000]
+
+
+def difflib_most_similar(extracted_names, names):
+    best = ["", 0]
+    matcher = difflib.SequenceMatcher()
+    for extraction in extracted_names:
+        for name in names:
+            matcher.set_seqs(extraction.lower(), name.lower())
+            similarity = matcher.ratio()
+            if SIMILARITY_FLOOR < similarity > best[1]:
+                best = [name, similarity]
+    return best[0]
+
+
+def generate(rng, size, count):
+    """
+    :return: (size names like VMs have, count queries that are names with a typo in about half of them)
+    """
+    names = set()
+    while len(names) < size:
+        names.add(f"{rng.choice(words)}-{rng.choice(words)}-{rng.randint(0, 999)}")
+    names = sorted(names)
+
+    queries = []
+    for _ in range(count):
+        query = list(rng.choice(names))
+        if rng.random() < 0.5:
+            query[rng.randrange(len(query))] = rng.choice(string.ascii_lowercase)
+        queries.append("".join(query))
+    return names, queries
+
+
+def report(name, seconds, count, agreement):
+    print(f"{name:<32}{seconds / count * 1000:>10.3f} ms/query   agrees with difflib on {agreement}/{count}")
+
+
+def main(count=50, seed=1):
+    logging.disable(logging.INFO)
+    rng = random.Random(seed)
+
+    for size in sizes:
+        names, queries = generate(rng, size, count)
+
+        start = perf_counter()
+        expected = [difflib_most_similar([query], names) for query in queries]
+        report(f"difflib, {size} names", perf_counter() - start, count, count)
+
+        start = perf_counter()
+        index = NameIndex(names)
+        build = perf_counter() - start
+        start = perf_counter()
+        results = [index.most_similar([query]) for query in queries]
+        agreement = sum((r[0][0] if r else "") == e for r, e in zip(results, expected))
+        report(f"trigram, {size} names", perf_counter() - start, count, agreement)
+        print(f"{'':<32}{build * 1000:>10.3f} ms to build")
+
+        start = perf_counter()
+        matcher = VectorNameMatcher(names)
+        build = perf_counter() - start
+        start = perf_counter()
+        results = [matcher.most_similar([query]) for query in queries]
+        agreement = sum((r[0][0] if r else "") == e for r, e in zip(results, expected))
+        report(f"vector, {size} names", perf_counter() - start, count, agreement)
+
+        start = perf_counter()
+        results = matcher.match_batch(queries)
+        agreement = sum((r[0] if r else "") == e for r, e in zip(results, expected))
+        report(f"vector batched, {size} names", perf_counter() - start, count, agreement)
+        print(f"{'':<32}{build * 1000:>10.3f} ms to build")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,26 @@
+"""
+Build step, trains the bot on a fresh database and writes a snapshot
+that run.py loads on startup instead of training the bot.
+Usage: python build_snapshot.py [snapshot path]
+"""
+import sys
+from logging import getLogger
+from logging.config import fileConfig
+from os import path
+from tempfile import TemporaryDirectory
+
+fileConfig('../logging_config.ini')
+log = getLogger(__name__)
+
+# insert backend and common to path
+sys.path.insert(0, '../')
+
+if __name__ == '__main__':
+    from backend.waldur.waldur import init_bot, train_bot
+    from backend.waldur.training import write_snapshot, DEFAULT_SNAPSHOT_PATH
+
+    snapshot = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_SNAPSHOT_PATH
+
+    with TemporaryDirectory() as directory:
+        chatbot = train_bot(init_bot(database=path.join(directory, 'chatterbotdb.sqlite3')))
+        write_snapshot(chatbot, snapshot)
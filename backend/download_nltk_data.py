@@ -0,0 +1,24 @@
+"""
+Build step, downloads the NLTK models nameparser needs so that nothing is downloaded when the bot runs.
+Usage: python download_nltk_data.py [directory]
+Directory defaults to WALDUR_NLTK_DATA or backend/nltk_data, where nameparser looks for the models.
+"""
+import sys
+from logging import getLogger
+from logging.config import fileConfig
+
+fileConfig('../logging_config.ini')
+log = getLogger(__name__)
+
+# insert backend and common to path
+sys.path.insert(0, '../')
+
+if __name__ == '__main__':
+    from backend.waldur.nltk_resources import download, require, data_dir
+
+    directory = sys.argv[1] if len(sys.argv) > 1 else data_dir
+
+    download(directory)
+    if directory == data_dir:
+        require()
+    log.info(f"NLTK models downloaded to {directory}")
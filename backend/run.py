@@ -24,9 +24,43 @@ sys.path.insert(0, '../')
 if __name__ == '__main__':
     try:
         from backend.waldur.waldur import init_api, init_bot, train_bot
+        from backend.waldur.training import load_snapshot, write_snapshot, DEFAULT_SNAPSHOT_PATH
+        from backend.waldur.nltk_resources import require
+        from backend.waldur.nameparser import set_name_matcher, set_name_extractor
+        from backend.waldur import offload
+        from common.request import sessions, response_cache
 
-        chatbot = init_bot()
-        train_bot(chatbot)
+        name_extractor = config['backend'].get('name_extractor', 'nltk')
+        set_name_extractor(name_extractor)
+
+        # fail on startup instead of on the first query if NLTK models are not downloaded
+        if name_extractor == 'rules':
+            require('stopwords')
+        else:
+            require()
+
+        set_name_matcher(config['backend'].get('name_matcher', 'trigram'))
+
+        sessions.configure(
+            pool_size=config['backend'].getint('api_pool_size', 10),
+            block=config['backend'].getboolean('api_pool_block', False)
+        )
+        response_cache.configure(maxsize=config['backend'].getint('api_cache_size', 1024))
+
+        nlp_processes = config['backend'].getint('nlp_processes', 0)
+        if nlp_processes > 0:
+            offload.start(nlp_processes)
+
+        chatbot = init_bot(
+            matcher=config['backend'].get('matcher', 'index'),
+            storage=config['backend'].get('storage', 'sql'),
+            response_cache_size=config['backend'].getint('response_cache_size', 1024)
+        )
+
+        snapshot = config['backend'].get('snapshot', DEFAULT_SNAPSHOT_PATH)
+        if not load_snapshot(chatbot, snapshot):
+            train_bot(chatbot)
+            write_snapshot(chatbot, snapshot)
 
         api = init_api(chatbot)
         app = api.app
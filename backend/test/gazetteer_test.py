@@ -0,0 +1,40 @@
+from unittest import TestCase, main
+
+from backend.waldur.gazetteer import Gazetteer, get_gazetteer, tokenize
+from backend.waldur.nameparser import extract_names
+
+
+class GazetteerTests(TestCase):
+
+    def setUp(self):
+        self.names = ["Waldur Chatbot", "Waldur", "Waldur Chatbot Testing", "vm-01", "Alice's project", "my"]
+        self.gazetteer = Gazetteer(self.names)
+
+    def test_tokenize(self):
+        self.assertEqual(["alice", "'", "s", "vm", "-", "01", "?"], tokenize("Alice's vm-01?"))
+
+    def test_find_ignores_case(self):
+        self.assertEqual(["Waldur Chatbot"], self.gazetteer.find("costs of waldur chatbot?"))
+
+    def test_find_in_order(self):
+        self.assertEqual(
+            ["vm-01", "Alice's project"],
+            self.gazetteer.find("Is VM-01 in alice's project")
+        )
+
+    def test_longest_name_wins(self):
+        self.assertEqual(["Waldur Chatbot Testing"], self.gazetteer.find("my vms in Waldur Chatbot Testing"))
+        self.assertEqual(["Waldur"], self.gazetteer.find("my vms in Waldur Chat"))
+
+    def test_stopword_names_are_ignored(self):
+        self.assertEqual([], self.gazetteer.find("my projects"))
+
+    def test_gazetteer_is_reused_for_same_names(self):
+        self.assertIs(get_gazetteer(self.names), get_gazetteer(list(self.names)))
+
+    def test_extract_names_tries_known_names_first(self):
+        self.assertEqual(["Waldur Chatbot"], extract_names("my vms in waldur chatbot", ["Waldur Chatbot"]))
+
+
+if __name__ == '__main__':
+    main()
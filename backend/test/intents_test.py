@@ -0,0 +1,142 @@
+from unittest import TestCase, main
+
+from chatterbot.comparisons import levenshtein_distance
+from chatterbot.conversation import Statement, Response
+
+from backend.waldur.intents import IntentIndex, normalize, strip_names, most_similar
+from backend.waldur.nameparser import extract_names_regex
+
+
+class MockStorage:
+    def __init__(self, *conversations):
+        self.statements = []
+        for prompt, response in conversations:
+            statement = Statement(response)
+            statement.add_response(Response(prompt))
+            self.statements.append(statement)
+
+    def filter(self):
+        return self.statements
+
+
+class IntentIndexTests(TestCase):
+
+    def setUp(self):
+        self.index = IntentIndex().load(MockStorage(
+            ("my projects", "REQUEST~get_projects"),
+            ("my vms", "REQUEST~get_vms"),
+            ("my vms in project of organisation", "REQUEST~get_vms_by_project_and_organisation"),
+            ("Who are you?", "I am Waldur Bot beep boop"),
+        ))
+
+    def test_normalize(self):
+        self.assertEqual("my projects", normalize("  My   Projects "))
+
+    def test_exact_match_has_full_confidence(self):
+        match = self.index.match("my projects")
+        self.assertEqual("REQUEST~get_projects", match.response)
+        self.assertEqual(1, match.confidence)
+
+    def test_closest_match(self):
+        match = self.index.match("give me my vms in project of organisation")
+        self.assertEqual("REQUEST~get_vms_by_project_and_organisation", match.response)
+        self.assertLess(match.confidence, 1)
+
+    def test_case_insensitive(self):
+        self.assertEqual("I am Waldur Bot beep boop", self.index.match("who are you?").response)
+
+    def test_no_match_without_common_tokens(self):
+        self.assertIsNone(self.index.match("asdf qwer"))
+
+    def test_misspelled_query_without_common_tokens(self):
+        self.assertEqual("REQUEST~get_projects", self.index.match("myprojects").response)
+
+    def test_added_statement_is_matched(self):
+        self.index.add("Hi", "Hello")
+        self.assertEqual(5, len(self.index))
+        self.assertEqual("Hello", self.index.match("hi").response)
+
+    def test_first_response_is_kept(self):
+        self.index.add("my projects", "something else")
+        self.assertEqual("REQUEST~get_projects", self.index.match("my projects").response)
+
+    def test_lookup_ignores_case_and_punctuation(self):
+        self.assertEqual("I am Waldur Bot beep boop", self.index.lookup("who  are you"))
+        self.assertEqual(1, self.index.exact_hits)
+
+    def test_lookup_misses_similar_statement(self):
+        self.assertIsNone(self.index.lookup("my project"))
+        self.assertEqual(1, self.index.exact_misses)
+
+    def test_lookup_prefers_same_text(self):
+        self.index.add("My Projects", "something else")
+        self.assertEqual("REQUEST~get_projects", self.index.lookup("MY PROJECTS"))
+        self.assertEqual("something else", self.index.lookup("My Projects"))
+
+    def test_same_confidence_as_chatterbot(self):
+        # ratio of these is 0.35 one way and 0.12 the other
+        query, known = "are list what", "services providers in"
+        expected = levenshtein_distance.compare(Statement(query), Statement(known))
+        self.assertEqual((0, expected), most_similar(query, [known]))
+
+    def test_candidates_are_limited(self):
+        self.index.max_candidates = 1
+        self.assertEqual("REQUEST~get_vms", self.index.match("my vms").response)
+        self.assertLessEqual(len(self.index.candidates("my vms")), 2)
+
+    def test_common_tokens_are_skipped_with_rarer_ones(self):
+        index = IntentIndex(max_candidates=2)
+        for i in range(20):
+            index.add(f"show my item {i}", str(i))
+        index.add("show my costs", "REQUEST~get_costs")
+        index.lsh.query = lambda text: {}
+
+        self.assertEqual([20], index.candidates("show my costs"))
+        self.assertEqual(2, len(index.candidates("show my items")))
+
+
+def strip_names_by_replacing(query, names):
+    """
+    How Query removed names before strip_names
+    """
+    names_excluded = query
+    for x in names:
+        for splitted in x.split():
+            names_excluded = names_excluded.replace(splitted, "").strip()
+            names_excluded = " ".join(names_excluded.split())
+    return names_excluded
+
+
+class StripNamesTests(TestCase):
+
+    queries = [
+        "Please tell me what organisations am I part of.",
+        "Please give me my service providers in organisation Waldur Chatbot testbed",
+        "Please give me my service providers in project Waldur Chatbot of organisation 2018 Test",
+        "What's the state of virtual machine WaldurChatbot Test?",
+        "Can you show me which virtual machines is my organisation Waldur Chatbot testbed using?",
+        "What virtual machines do I have in project OpenStack of organisation Alpha Beta?",
+        "What is the total cost of organisation Waldur Chatbot testbed",
+        "What is the state of VM Alpha in Beta",
+        "What costs do I have in Alpha for Beta",
+        "Show VMs of Alpha and Beta",
+        "what are  my projects?",
+        "hello",
+    ]
+
+    def test_same_as_replacing_names(self):
+        for query in self.queries:
+            names = extract_names_regex(query)
+            self.assertEqual(normalize(strip_names_by_replacing(query, names)), strip_names(query, names), query)
+
+    def test_only_whole_words_are_removed(self):
+        self.assertEqual("my vm1 status", strip_names("my VM VM1 status", ["VM"]))
+        self.assertEqual("vm status of alpha", strip_names("VM status of Alpha Beta Alpha", ["Alpha Beta"]))
+
+    def test_every_extracted_occurrence_is_removed(self):
+        self.assertEqual("move from to", strip_names("move Alpha from Alpha to Alpha", ["Alpha", "Alpha", "Alpha"]))
+        self.assertEqual("is it running?", strip_names("is Alpha, Beta? it running?", ["Alpha", "Beta"]))
+
+
+if __name__ == '__main__':
+    main()
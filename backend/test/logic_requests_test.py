@@ -3,6 +3,16 @@ from unittest import TestCase, main, mock
 from backend.waldur.logic.requests import *
 
 
+def one_page(query):
+    """
+    :param query: mocked WaldurConnection.query
+    :return: mocked WaldurConnection._send answering with what query returns and no next page
+    """
+    def send(**kwargs):
+        return query(**kwargs), None
+    return send
+
+
 class RequestTestCase(TestCase):
     def assert_correct_response_format(self, response, response_type="text"):
         self.assertIn('data', response)
@@ -35,18 +45,18 @@ class TestGetServicesRequests(RequestTestCase):
         self.get_services = GetServicesRequest()
         self.get_services.set_token("asd")
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_get_services_0_names)
+    @mock.patch('common.request.WaldurConnection._send', side_effect=one_page(mocked_query_get_services_0_names))
     def test_get_services_0(self, mock):
         response = self.get_services.process()
         self.assert_correct_response_format(response)
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_get_services_1_name)
+    @mock.patch('common.request.WaldurConnection._send', side_effect=one_page(mocked_query_get_services_1_name))
     def test_get_services_1(self, mock):
         response = self.get_services.process()
         self.assert_correct_response_format(response)
         self.assertIn("test1", response['data'])
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_get_services_2_names)
+    @mock.patch('common.request.WaldurConnection._send', side_effect=one_page(mocked_query_get_services_2_names))
     def test_get_services_2(self, mock):
         response = self.get_services.process()
         self.assert_correct_response_format(response)
@@ -113,19 +123,19 @@ class TestGetProjectsRequests(RequestTestCase):
         self.get_projects = GetProjectsRequest()
         self.get_projects.set_token("asd")
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_get_projects_0_names)
+    @mock.patch('common.request.WaldurConnection._send', side_effect=one_page(mocked_query_get_projects_0_names))
     def test_get_projects_0(self, mock):
         response = self.get_projects.process()
         self.assert_correct_response_format(response)
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_get_projects_1_name)
+    @mock.patch('common.request.WaldurConnection._send', side_effect=one_page(mocked_query_get_projects_1_name))
     def test_get_projects_1(self, mock):
         response = self.get_projects.process()
         self.assert_correct_response_format(response)
         self.assertIn("org1", response['data'])
         self.assertIn("test1", response['data'])
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_get_projects_2_names)
+    @mock.patch('common.request.WaldurConnection._send', side_effect=one_page(mocked_query_get_projects_2_names))
     def test_get_projects_2(self, mock):
         response = self.get_projects.process()
         self.assert_correct_response_format(response)
@@ -133,7 +143,8 @@ class TestGetProjectsRequests(RequestTestCase):
         self.assertIn("test1", response['data'])
         self.assertIn("test2", response['data'])
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_get_projects_2_organisations)
+    @mock.patch('common.request.WaldurConnection._send',
+                side_effect=one_page(mocked_query_get_projects_2_organisations))
     def test_get_projects_3(self, mock):
         response = self.get_projects.process()
         self.assert_correct_response_format(response)
@@ -143,7 +154,8 @@ class TestGetProjectsRequests(RequestTestCase):
         self.assertIn("org2", response['data'])
         self.assertIn("test3", response['data'])
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_get_projects_2_organisations_1_empty)
+    @mock.patch('common.request.WaldurConnection._send',
+                side_effect=one_page(mocked_query_get_projects_2_organisations_1_empty))
     def test_get_projects_4(self, mock):
         response = self.get_projects.process()
         self.assert_correct_response_format(response)
@@ -152,7 +164,8 @@ class TestGetProjectsRequests(RequestTestCase):
         self.assertIn("test2", response['data'])
         self.assertNotIn("org2", response['data'])
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_use_case_3_regular_get_projects)
+    @mock.patch('common.request.WaldurConnection._send',
+                side_effect=one_page(mocked_query_use_case_3_regular_get_projects))
     def test_get_projects_5(self, mock):
         response = self.get_projects.process()
         self.assert_correct_response_format(response)
@@ -160,7 +173,8 @@ class TestGetProjectsRequests(RequestTestCase):
         correct_response += "Waldur Chatbot testbed\n    2nd project\nOrganisation 'Waldur Maie':\n    W-M project"
         self.assertEqual(correct_response, response['data'])
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_use_case_3_alt_a_get_projects)
+    @mock.patch('common.request.WaldurConnection._send',
+                side_effect=one_page(mocked_query_use_case_3_alt_a_get_projects))
     def test_get_projects_6(self, mock):
         response = self.get_projects.process()
         self.assert_correct_response_format(response)
@@ -168,7 +182,8 @@ class TestGetProjectsRequests(RequestTestCase):
         correct_response += "Waldur Chatbot testbed"
         self.assertEqual(correct_response, response['data'])
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_use_case_3_alt_b_get_projects)
+    @mock.patch('common.request.WaldurConnection._send',
+                side_effect=one_page(mocked_query_use_case_3_alt_b_get_projects))
     def test_get_projects_7(self, mock):
         response = self.get_projects.process()
         self.assert_correct_response_format(response)
@@ -268,12 +283,12 @@ class TestGetVmsRequests(RequestTestCase):
         self.get_vms = GetVmsRequest()
         self.get_vms.set_token("asd")
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_get_vms_0_names)
+    @mock.patch('common.request.WaldurConnection._send', side_effect=one_page(mocked_query_get_vms_0_names))
     def test_get_vms_0(self, mock):
         response = self.get_vms.process()
         self.assert_correct_response_format(response)
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_get_vms_1_name)
+    @mock.patch('common.request.WaldurConnection._send', side_effect=one_page(mocked_query_get_vms_1_name))
     def test_get_vms_1(self, mock):
         response = self.get_vms.process()
         self.assert_correct_response_format(response)
@@ -283,7 +298,7 @@ class TestGetVmsRequests(RequestTestCase):
         self.assertIn("1.0", response['data'])
         self.assertIn("1.2", response['data'])
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_get_vms_2_names)
+    @mock.patch('common.request.WaldurConnection._send', side_effect=one_page(mocked_query_get_vms_2_names))
     def test_get_vms_2(self, mock):
         response = self.get_vms.process()
         self.assert_correct_response_format(response)
@@ -296,7 +311,7 @@ class TestGetVmsRequests(RequestTestCase):
         self.assertIn("2.1", response['data'])
         self.assertIn("2.2", response['data'])
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_use_case_12_regular_get_vms)
+    @mock.patch('common.request.WaldurConnection._send', side_effect=one_page(mocked_query_use_case_12_regular_get_vms))
     def test_get_vms_3(self, mock):
         response = self.get_vms.process()
         self.assert_correct_response_format(response)
@@ -310,7 +325,7 @@ class TestGetVmsRequests(RequestTestCase):
                       "\n    WaldurChatbot Production: localhost / 193.40.11.175"
         self.assertTrue(c_response == response['data'] or c_response2 == response['data'])
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_use_case_12_alt_b_get_vms)
+    @mock.patch('common.request.WaldurConnection._send', side_effect=one_page(mocked_query_use_case_12_alt_b_get_vms))
     def test_get_vms_4(self, mock):
         response = self.get_vms.process()
         self.assert_correct_response_format(response)
@@ -318,13 +333,14 @@ class TestGetVmsRequests(RequestTestCase):
                      "\n    WaldurChatbot Develop: 127.0.0.1 / 193.40.11.164"
         self.assertEqual(c_response, response['data'])
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_use_case_12_alt_c_get_vms)
+    @mock.patch('common.request.WaldurConnection._send', side_effect=one_page(mocked_query_use_case_12_alt_c_get_vms))
     def test_get_vms5(self, mock):
         response = self.get_vms.process()
         self.assert_correct_response_format(response)
         self.assertEqual("You don't have any virtual machines.", response['data'])
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_use_case_12_regular_two_ips_get_vms)
+    @mock.patch('common.request.WaldurConnection._send',
+                side_effect=one_page(mocked_query_use_case_12_regular_two_ips_get_vms))
     def test_get_vms_6(self, mock):
         response = self.get_vms.process()
         self.assert_correct_response_format(response)
@@ -338,7 +354,8 @@ class TestGetVmsRequests(RequestTestCase):
                       "WaldurChatbot Develop: 127.0.0.1 / 193.40.11.164"
         self.assertTrue(c_response == response['data'] or c_response2 == response['data'])
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_use_case_12_alt_b_two_ips_get_vms)
+    @mock.patch('common.request.WaldurConnection._send',
+                side_effect=one_page(mocked_query_use_case_12_alt_b_two_ips_get_vms))
     def test_get_vms_7(self, mock):
         response = self.get_vms.process()
         self.assert_correct_response_format(response)
@@ -346,7 +363,7 @@ class TestGetVmsRequests(RequestTestCase):
         correct_response += "\n    WaldurChatbot Develop: 127.0.0.1 / 193.40.11.164, localhost"
         self.assertEqual(correct_response, response['data'])
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_get_vms_no_ip)
+    @mock.patch('common.request.WaldurConnection._send', side_effect=one_page(mocked_query_get_vms_no_ip))
     def test_get_vms_8(self, mock):
         response = self.get_vms.process()
         self.assert_correct_response_format(response)
@@ -354,7 +371,8 @@ class TestGetVmsRequests(RequestTestCase):
         self.assertIn("name1", response['data'])
         self.assertIn("- / -", response['data'])
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_use_case_12_alt_b_no_ip_get_vms)
+    @mock.patch('common.request.WaldurConnection._send',
+                side_effect=one_page(mocked_query_use_case_12_alt_b_no_ip_get_vms))
     def test_get_vms_9(self, mock):
         response = self.get_vms.process()
         self.assert_correct_response_format(response)
@@ -362,7 +380,8 @@ class TestGetVmsRequests(RequestTestCase):
         correct_response += "\n    WaldurChatbot Develop: localhost / None"
         self.assertEqual(correct_response, response['data'])
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_use_case_12_alt_b_no_int_ip_get_vms)
+    @mock.patch('common.request.WaldurConnection._send',
+                side_effect=one_page(mocked_query_use_case_12_alt_b_no_int_ip_get_vms))
     def test_get_vms_10(self, mock):
         response = self.get_vms.process()
         self.assert_correct_response_format(response)
@@ -396,24 +415,30 @@ class TestGetOrganisationsRequests(RequestTestCase):
         self.get_organisations = GetOrganisationsRequest()
         self.get_organisations.set_token("asd")
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_get_organisations_0_names)
+    @mock.patch('common.request.WaldurConnection._send', side_effect=one_page(mocked_query_get_organisations_0_names))
     def test_get_organisations_0(self, mock):
         response = self.get_organisations.process()
         self.assert_correct_response_format(response)
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_get_organisations_1_name)
+    @mock.patch('common.request.WaldurConnection._send', side_effect=one_page(mocked_query_get_organisations_1_name))
     def test_get_organisations_1(self, mock):
         response = self.get_organisations.process()
         self.assert_correct_response_format(response)
         self.assertIn("test1", response['data'])
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_get_organisations_2_names)
+    @mock.patch('common.request.WaldurConnection._send', side_effect=one_page(mocked_query_get_organisations_2_names))
     def test_get_organisations_2(self, mock):
         response = self.get_organisations.process()
         self.assert_correct_response_format(response)
         self.assertIn("test1", response['data'])
         self.assertIn("test2", response['data'])
 
+    @mock.patch('common.request.WaldurConnection._send', side_effect=one_page(mocked_query_get_organisations_1_name))
+    def test_get_organisations_requests_only_names(self, mock):
+        self.get_organisations.process()
+        self.assertEqual({"page_size": 100, "field": ["name"]}, mock.call_args[1]['parameters'])
+        self.assertEqual({"page_size": 100}, self.get_organisations.parameters)
+
 
 def mocked_query_get_total_cost_graph_org(method, data, endpoint, parameters):
     return mocked_query_get_total_cost_graph_response(('123', "Waldur Chatbot", 1, 1996, 1000000, "Meh"))
@@ -441,19 +466,19 @@ class TestGetTotalCostGraphRequest(RequestTestCase):
         self.get_graph = GetTotalCostGraphRequest()
         self.get_graph.set_token("asd")
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_get_total_cost_graph_empty)
+    @mock.patch('common.request.WaldurConnection._send', side_effect=one_page(mocked_query_get_total_cost_graph_empty))
     def test_get_total_cost_of_organisation_0(self, mock):
         self.get_graph.set_original("organisation Waldur Maie")
         response = self.get_graph.process()
         self.assert_correct_response_format(response, "text")
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_get_total_cost_graph_org)
+    @mock.patch('common.request.WaldurConnection._send', side_effect=one_page(mocked_query_get_total_cost_graph_org))
     def test_get_total_cost_of_organisation_1(self, mock):
         self.get_graph.set_original("organisation Waldur Chatbot")
         response = self.get_graph.process()
         self.assert_correct_response_format(response, "graph")
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_get_total_cost_graph_org)
+    @mock.patch('common.request.WaldurConnection._send', side_effect=one_page(mocked_query_get_total_cost_graph_org))
     def test_get_total_cost_of_organisation_2(self, mock):
         self.get_graph.set_original("organisation Maie")
         response = self.get_graph.process()
@@ -462,7 +487,7 @@ class TestGetTotalCostGraphRequest(RequestTestCase):
                      "Please check that an organisation with that name exists."
         self.assertEqual(c_response, response['data'])
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_get_total_cost_graph_org)
+    @mock.patch('common.request.WaldurConnection._send', side_effect=one_page(mocked_query_get_total_cost_graph_org))
     def test_get_total_cost_of_organisation_3(self, mock):
         self.get_graph.set_original("organisation waldur maie")
         response = self.get_graph.process()
@@ -472,7 +497,7 @@ class TestGetTotalCostGraphRequest(RequestTestCase):
         self.assertNotIn("maie", response['data'])
         self.assertNotIn("waldur", response['data'])
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_get_total_cost_graph_org)
+    @mock.patch('common.request.WaldurConnection._send', side_effect=one_page(mocked_query_get_total_cost_graph_org))
     def test_get_total_cost_of_organisation_4(self, mock):
         self.get_graph.set_original("organisation waldur maie")
         response = self.get_graph.process()
@@ -481,6 +506,12 @@ class TestGetTotalCostGraphRequest(RequestTestCase):
                      "Please write it out in capital case!"
         self.assertEqual(c_response, response['data'])
 
+    @mock.patch('common.request.WaldurConnection._send', side_effect=one_page(mocked_query_get_total_cost_graph_org))
+    def test_get_total_cost_of_organisation_lowercase(self, mock):
+        self.get_graph.set_original("organisation waldur chatbot")
+        response = self.get_graph.process()
+        self.assert_correct_response_format(response, "graph")
+
 
 def mocked_query_get_org_ids_1_name(method, data, endpoint, parameters):
     return create_get_org_ids_response(("test1", "id1"))
@@ -504,13 +535,13 @@ class TestGetOrganisationsAndIdsRequests(RequestTestCase):
         self.get_org_ids = GetOrganisationsAndIdsRequest()
         self.get_org_ids.set_token("asd")
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_get_org_ids_1_name)
+    @mock.patch('common.request.WaldurConnection._send', side_effect=one_page(mocked_query_get_org_ids_1_name))
     def test_get_org_ids_1(self, mock):
         response = self.get_org_ids.process()
         self.assertIn('test1', response)
         self.assertIn('id1', response['test1'])
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_get_org_ids_2_names)
+    @mock.patch('common.request.WaldurConnection._send', side_effect=one_page(mocked_query_get_org_ids_2_names))
     def test_get_org_ids_2(self, mock):
         response = self.get_org_ids.process()
         self.assertIn('test1', response)
@@ -558,19 +589,19 @@ class TestGetPrivateCloudsByOrganisationRequests(RequestTestCase):
         self.get_cloud_by_org.set_token("asd")
         self.get_cloud_by_org.set_original("organisation Waldur Maie")
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_get_clouds_by_org_no_org)
+    @mock.patch('common.request.WaldurConnection._send', side_effect=one_page(mocked_query_get_clouds_by_org_no_org))
     def test_get_cloud_by_org_0(self, mock):
         response = self.get_cloud_by_org.process()
         self.assertIn("\"Waldur Maie\"", response['data'])
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_get_clouds_by_org_no_org)
+    @mock.patch('common.request.WaldurConnection._send', side_effect=one_page(mocked_query_get_clouds_by_org_no_org))
     def test_get_cloud_by_org_1(self, mock):
         response = self.get_cloud_by_org.process()
         c_response = "Sorry, I wasn't able to find an organisation with the name \"Waldur Maie\". " \
                      "Please check that an organisation with that name exists."
         self.assertEqual(c_response, response['data'])
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_get_clouds_by_org_no_org)
+    @mock.patch('common.request.WaldurConnection._send', side_effect=one_page(mocked_query_get_clouds_by_org_no_org))
     def test_get_cloud_by_org_2(self, mock):
         self.get_cloud_by_org.set_original("organisation waldur maie")
         response = self.get_cloud_by_org.process()
@@ -579,7 +610,7 @@ class TestGetPrivateCloudsByOrganisationRequests(RequestTestCase):
         self.assertNotIn("maie", response['data'])
         self.assertNotIn("waldur", response['data'])
 
-    @mock.patch('common.request.WaldurConnection.query', side_effect=mocked_query_get_clouds_by_org_no_org)
+    @mock.patch('common.request.WaldurConnection._send', side_effect=one_page(mocked_query_get_clouds_by_org_no_org))
     def test_get_cloud_by_org_3(self, mock):
         self.get_cloud_by_org.set_original("organisation waldur maie")
         response = self.get_cloud_by_org.process()
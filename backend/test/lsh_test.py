@@ -0,0 +1,34 @@
+import pickle
+from unittest import TestCase, main
+
+from backend.waldur.lsh import MinHashLSH, shingles
+
+
+class MinHashLSHTests(TestCase):
+
+    def setUp(self):
+        self.lsh = MinHashLSH()
+        for i, text in enumerate(["hello", "what are my projects", "show my virtual machines", "good morning"]):
+            self.lsh.add(i, text)
+
+    def test_shingles(self):
+        self.assertEqual({" hi", "hi "}, shingles("hi"))
+
+    def test_same_text_shares_all_buckets(self):
+        self.assertEqual({1: self.lsh.bands}, dict(self.lsh.query("what are my projects")))
+
+    def test_similar_text_shares_a_bucket(self):
+        self.assertIn(0, self.lsh.query("helo"))
+        self.assertIn(2, self.lsh.query("show my virtual machnies"))
+
+    def test_different_text_shares_no_bucket(self):
+        self.assertEqual({}, dict(self.lsh.query("xyz")))
+
+    def test_signatures_survive_pickling(self):
+        lsh = pickle.loads(pickle.dumps(self.lsh))
+        self.assertEqual(dict(self.lsh.query("good mornin")), dict(lsh.query("good mornin")))
+        self.assertEqual(list(self.lsh.signature("hello")), list(MinHashLSH().signature("hello")))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+from unittest import TestCase, main
+
+from backend.waldur.nameparser import NamePipeline, get_pipeline, extract_names_regex, extraction_cache
+
+
+class NamePipelineTests(TestCase):
+
+    def setUp(self):
+        self.pipeline = NamePipeline()
+
+    def test_pipeline_is_shared(self):
+        self.assertIs(get_pipeline(), get_pipeline())
+
+    def test_stopwords_are_removed(self):
+        self.assertEqual("show projects Waldur", self.pipeline.remove_stopwords("Show me the projects of Waldur"))
+
+    def test_find_names(self):
+        self.assertEqual(["Waldur Chatbot", "4th"], self.pipeline.find_names("Is Waldur Chatbot running on 4th"))
+        self.assertEqual(["Waldur Chatbot"], extract_names_regex("What is in Waldur Chatbot"))
+
+    def test_chunk(self):
+        tagged = [[("projects", "NNS"), ("Waldur", "NNP"), ("and", "CC"), ("Chatbot", "NNP"), ("team", "NN")]]
+        self.assertEqual(["Waldur and Chatbot"], self.pipeline.chunk(tagged))
+
+    def test_stats(self):
+        self.pipeline.find_names("projects of Waldur")
+        self.pipeline.find_names("projects of Waldur")
+
+        stats = self.pipeline.stats()
+        self.assertEqual(2, stats['stopwords']['calls'])
+        self.assertEqual(2, stats['regex']['calls'])
+        self.assertGreater(stats['regex']['time'], 0)
+
+
+class ExtractionCacheTests(TestCase):
+
+    def setUp(self):
+        extraction_cache.clear()
+
+    def test_extraction_is_cached(self):
+        before = get_pipeline().stats().get('regex', {'calls': 0})['calls']
+        hits = extraction_cache.hits
+
+        self.assertEqual(["Waldur"], extract_names_regex("projects of Waldur"))
+        self.assertEqual(["Waldur"], extract_names_regex("projects of Waldur"))
+
+        self.assertEqual(before + 1, get_pipeline().stats()['regex']['calls'])
+        self.assertEqual(hits + 1, extraction_cache.hits)
+
+    def test_cached_names_are_not_changed_by_caller(self):
+        extract_names_regex("projects of Waldur").append("something")
+        self.assertEqual(["Waldur"], extract_names_regex("projects of Waldur"))
+
+    def test_no_names_are_cached(self):
+        self.assertEqual([], extract_names_regex("my projects"))
+        self.assertEqual([], extract_names_regex("my projects"))
+        self.assertIn(('regex', "my projects"), extraction_cache)
+
+
+if __name__ == '__main__':
+    main()
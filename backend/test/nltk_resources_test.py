@@ -0,0 +1,43 @@
+import subprocess
+import sys
+from unittest import TestCase, main, mock
+
+from backend.waldur import nltk_resources
+from backend.waldur.nltk_resources import MissingNLTKDataError, require, load_nltk, data_dir
+
+missing_model = {
+    'missing': {
+        True: ('missing', 'corpora/missing_model'),
+        False: ('missing', 'corpora/missing_model'),
+    }
+}
+
+
+class NLTKResourcesTests(TestCase):
+
+    def test_nltk_is_not_imported_with_resources(self):
+        output = subprocess.check_output([
+            sys.executable, '-c', "import sys, backend.waldur.resources; print('nltk' in sys.modules)"
+        ])
+        self.assertEqual(b"False", output.strip())
+
+    def test_data_dir_is_searched_first(self):
+        self.assertEqual(data_dir, load_nltk().data.path[0])
+
+    @mock.patch.dict(nltk_resources.models, missing_model)
+    def test_missing_model_raises(self):
+        with self.assertRaises(MissingNLTKDataError) as context:
+            require('missing')
+        self.assertIn("'missing' is not downloaded", str(context.exception))
+
+    @mock.patch('nltk.download')
+    def test_nothing_is_downloaded_on_use(self, download):
+        try:
+            require()
+        except MissingNLTKDataError:
+            pass
+        download.assert_not_called()
+
+
+if __name__ == '__main__':
+    main()
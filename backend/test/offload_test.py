@@ -0,0 +1,41 @@
+from os import getpid
+from unittest import TestCase, main
+
+from backend.waldur import offload
+from backend.waldur.intents import IntentIndex
+
+
+class OffloadTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        offload.start(1)
+
+    @classmethod
+    def tearDownClass(cls):
+        offload.shutdown()
+
+    def test_run_in_worker(self):
+        self.assertTrue(offload.enabled())
+        self.assertNotEqual(getpid(), offload.run(getpid))
+
+    def test_intent_match_in_worker(self):
+        index = IntentIndex()
+        index.add("my projects", "REQUEST~get_projects")
+        index.add("Who are you?", "I am Waldur Bot beep boop")
+
+        match = index.match("who are u")
+        self.assertEqual("I am Waldur Bot beep boop", match.response)
+        self.assertLess(match.confidence, 1)
+        self.assertIsNone(index.match("qqqq"))
+
+
+class DisabledOffloadTests(TestCase):
+
+    def test_run_in_caller(self):
+        self.assertFalse(offload.enabled())
+        self.assertEqual(getpid(), offload.run(getpid))
+
+
+if __name__ == '__main__':
+    main()
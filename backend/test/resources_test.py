@@ -103,6 +103,65 @@ class QueryTests(WaldurTests):
         self.assert_correct_response_form(response)
 
 
+    @mock.patch('chatterbot.ChatBot.get_response', side_effect=raise_Exception)
+    def test_known_statement_does_not_consult_bot(self, mock):
+        self.bot.intent_index.add("Who are you?", "I am Waldur Bot beep boop")
+        self.bot.intent_index.loaded = True
+
+        response = self.post(
+            data={
+                'query': "who are you"
+            }
+        )
+        self.assertEqual(200, response.status_code)
+        response = json.loads(response.get_data())
+        self.assert_correct_response_form(response)
+        self.assertEqual("I am Waldur Bot beep boop", response[0]['data'])
+        self.assertEqual(1, self.bot.intent_index.exact_hits)
+
+    @mock.patch('chatterbot.ChatBot.get_response', side_effect=return_ok)
+    def test_repeated_query_is_cached(self, mock):
+        for query in ["What are my projects?", "what are  my projects?"]:
+            response = self.post(
+                data={
+                    'query': query
+                }
+            )
+            self.assertEqual(200, response.status_code)
+            self.assertEqual("ok", json.loads(response.get_data())[0]['data'])
+
+        self.assertEqual(1, mock.call_count)
+        self.assertEqual(1, self.bot.response_cache.stats()['hits'])
+        self.assertEqual(1, self.bot.response_cache.stats()['misses'])
+
+    def test_learning_from_queries_keeps_cached_responses(self):
+        # chatterbot learns from every query it answers, which must not empty the cache
+        for _ in range(3):
+            response = self.post(data={'query': "could you list all of my projects"})
+            self.assertEqual(200, response.status_code)
+
+        stats = self.bot.response_cache.stats()
+        self.assertEqual(2, stats['hits'])
+        self.assertEqual(1, stats['misses'])
+        self.assertEqual(1, stats['size'])
+
+    @mock.patch('chatterbot.ChatBot.get_response', side_effect=return_ok)
+    def test_names_are_stripped_before_matching(self, mock):
+        for query in ["What virtual machines are in project Alpha?", "What virtual machines are in project Beta?"]:
+            self.post(data={'query': query})
+
+        mock.assert_called_once_with("what virtual machines are in project")
+        self.assertEqual(1, self.bot.response_cache.stats()['hits'])
+
+    @mock.patch('chatterbot.ChatBot.get_response', side_effect=return_ok)
+    def test_teach_invalidates_cached_responses(self, mock):
+        self.post(data={'query': "hello"})
+        self.app.post("/teach/", data={'statement': "Hi", 'previous_statement': "hello"})
+        self.post(data={'query': "hello"})
+
+        self.assertEqual(2, mock.call_count)
+
+
 class TeachTests(WaldurTests):
 
     def setUp(self):
@@ -0,0 +1,67 @@
+from unittest import TestCase, main
+
+from backend.waldur import nameparser
+from backend.waldur.nameparser import extract_names, set_name_extractor, extraction_cache
+from backend.waldur.rules import RuleExtractor
+
+
+class RuleExtractorTests(TestCase):
+
+    def setUp(self):
+        self.extractor = RuleExtractor(
+            vocabulary=["what", "is", "the", "total", "cost", "my", "costs", "team"],
+            stop=["the", "of", "in", "is", "my", "i", "what", "me", "s"],
+        )
+
+    def test_capitalized_words(self):
+        self.assertEqual(["Waldur Chatbot"], self.extractor.find("What is the cost of Waldur Chatbot?"))
+
+    def test_first_word_of_sentence_is_not_a_name(self):
+        self.assertEqual([], self.extractor.find("Show me my costs. What is the cost?"))
+        self.assertEqual(["ETAIS"], self.extractor.find("ETAIS costs"))
+
+    def test_words_with_digits(self):
+        self.assertEqual(["vm-01", "4th"], self.extractor.find("is vm-01 running on 4th"))
+
+    def test_lowercase_words_after_trigger(self):
+        self.assertEqual(["Waldur Chatbot testbed"],
+                         self.extractor.find("total cost of organisation Waldur Chatbot testbed"))
+        self.assertEqual(["alpha", "beta"], self.extractor.find("my vms in project alpha of organisation beta team"))
+
+    def test_lowercase_words_only_continue_names_after_trigger(self):
+        self.assertEqual(["Waldur Chatbot"], self.extractor.find("is Waldur Chatbot running"))
+
+    def test_keywords_are_boundaries(self):
+        self.assertEqual(["Alpha", "Beta"], self.extractor.find("vms in project Alpha of organisation Beta"))
+        self.assertEqual([], self.extractor.find("Show me my VMs in Projects"))
+
+    def test_capitalized_keywords_in_names(self):
+        self.assertEqual(["Cloud Pipeline", "Private Cloud"],
+                         self.extractor.find("vms in project Cloud Pipeline of organisation Private Cloud"))
+
+
+class RulesEngineTests(TestCase):
+
+    def setUp(self):
+        extraction_cache.clear()
+        set_name_extractor('rules')
+
+    def tearDown(self):
+        set_name_extractor('nltk')
+
+    def test_extract_names_with_rules(self):
+        self.assertEqual(["Waldur Chatbot testbed"],
+                         extract_names("What is the total cost of organisation Waldur Chatbot testbed"))
+        self.assertIn(('rules', "What is the total cost of organisation Waldur Chatbot testbed"), extraction_cache)
+
+    def test_known_names_are_tried_first(self):
+        self.assertEqual(["Waldur Chatbot"], extract_names("costs of waldur chatbot", ["Waldur Chatbot"]))
+
+    def test_unknown_extractor(self):
+        with self.assertRaises(ValueError):
+            set_name_extractor('perceptron')
+        self.assertEqual('rules', nameparser._name_extractor)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+from unittest import TestCase, main
+
+from backend.waldur.nameparser import getSimilarNames, set_name_matcher
+from backend.waldur.similarity import NameIndex, VectorNameMatcher, get_name_index
+
+
+class NameIndexTests(TestCase):
+
+    def setUp(self):
+        self.names = ["Waldur Chatbot", "Waldur Chatbot Testing", "Alice's project", "vm-01", "vm-02", "etais-web"]
+        self.index = NameIndex(self.names, max_candidates=3)
+
+    def test_most_similar(self):
+        self.assertEqual([("Waldur Chatbot", 1.0)], self.index.most_similar(["waldur chatbot"]))
+
+    def test_top_k_with_scores(self):
+        results = self.index.most_similar(["vm-03"], k=2)
+        self.assertEqual(["vm-01", "vm-02"], [name for name, _ in results])
+        self.assertEqual(0.8, results[0][1])
+
+    def test_similarity_floor(self):
+        self.assertEqual([], self.index.most_similar(["something else"]))
+
+    def test_candidates_are_limited(self):
+        self.assertLessEqual(len(self.index.candidates("vm-0")), 3)
+
+    def test_index_is_reused_for_same_names(self):
+        self.assertIs(get_name_index(self.names), get_name_index(list(self.names)))
+
+
+class VectorNameMatcherTests(TestCase):
+
+    def setUp(self):
+        self.names = ["Waldur Chatbot", "Waldur Chatbot Testing", "Alice's project", "vm-01", "vm-02", "etais-web"]
+        self.matcher = VectorNameMatcher(self.names)
+
+    def test_match_batch(self):
+        matches = self.matcher.match_batch(["waldur chatbot", "alices project", "something else"])
+        self.assertEqual("Waldur Chatbot", matches[0][0])
+        self.assertAlmostEqual(1, matches[0][1], places=5)
+        self.assertEqual("Alice's project", matches[1][0])
+        self.assertIsNone(matches[2])
+
+    def test_most_similar(self):
+        self.assertEqual(["vm-01", "vm-02"], [name for name, _ in self.matcher.most_similar(["vm-03"], k=2)])
+        self.assertEqual([], self.matcher.most_similar(["something else"]))
+
+    def test_no_names(self):
+        self.assertEqual([None], VectorNameMatcher([]).match_batch(["vm-01"]))
+
+
+class GetSimilarNamesTests(TestCase):
+
+    def tearDown(self):
+        set_name_matcher('trigram')
+
+    def test_best_match(self):
+        self.assertEqual("Waldur Chatbot", getSimilarNames(["Chatbot", "Waldur Chatbt"], ["Waldur Chatbot", "Other"]))
+
+    def test_no_match(self):
+        self.assertEqual("", getSimilarNames(["Something"], ["Waldur Chatbot"]))
+
+    def test_top(self):
+        self.assertEqual(
+            [("vm-01", 0.8), ("vm-02", 0.8)],
+            getSimilarNames(["vm-03"], ["vm-01", "vm-02", "etais-web"], top=2)
+        )
+
+    def test_vector_matcher(self):
+        set_name_matcher('vector')
+        self.assertEqual("Waldur Chatbot", getSimilarNames(["Chatbot", "Waldur Chatbt"], ["Waldur Chatbot", "Other"]))
+        self.assertEqual("", getSimilarNames(["Something"], ["Waldur Chatbot"]))
+
+    def test_unknown_matcher(self):
+        with self.assertRaises(ValueError):
+            set_name_matcher('something')
+
+
+if __name__ == '__main__':
+    main()
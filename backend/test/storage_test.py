@@ -0,0 +1,137 @@
+from os import path
+from tempfile import TemporaryDirectory
+from threading import Thread
+from unittest import TestCase, main
+
+from chatterbot.conversation import Statement
+
+from backend.waldur.training import write_snapshot, load_snapshot, dump_statements
+from backend.waldur.waldur import init_bot
+
+
+class TunedSQLStorageAdapterTests(TestCase):
+
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.bot = init_bot(storage='tuned', database=path.join(self.directory.name, 'test.sqlite3'))
+        self.storage = self.bot.storage
+
+    def tearDown(self):
+        self.storage.engine.dispose()
+        self.directory.cleanup()
+
+    def test_wal_and_indexes(self):
+        with self.storage.engine.connect() as connection:
+            self.assertEqual("wal", connection.execute("PRAGMA journal_mode").scalar())
+            indexes = {name for name, in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertIn("ix_response_text", indexes)
+        self.assertIn("ix_response_statement_text", indexes)
+
+    def test_stats_count_queries(self):
+        before = self.storage.stats()['queries']
+        self.storage.count()
+        stats = self.storage.stats()
+        self.assertEqual(before + 1, stats['queries'])
+        self.assertGreater(stats['query_time'], 0)
+
+    def test_connections_are_shared_between_threads(self):
+        connections = []
+
+        def connect():
+            with self.storage.engine.connect() as connection:
+                connections.append(connection.connection.connection)
+
+        connect()
+        thread = Thread(target=connect)
+        thread.start()
+        thread.join()
+
+        self.assertIs(connections[0], connections[1])
+
+    def test_writes_are_committed(self):
+        self.bot.learn_response(Statement("Hello"), Statement("Hi"))
+        with self.storage.engine.connect() as connection:
+            self.assertFalse(connection.connection.connection.in_transaction)
+        self.assertEqual(["Hi"], [response.text for response in self.storage.find("Hello").in_response_to])
+
+    def test_concurrent_reads_and_writes(self):
+        errors = []
+
+        def teach(i):
+            try:
+                self.bot.learn_response(Statement(f"answer {i}"), Statement(f"question {i}"))
+                self.storage.filter()
+            except Exception as e:
+                errors.append(e)
+
+        # more threads than pool_size, so connections are both reused and opened over the pool size
+        threads = [Thread(target=teach, args=(i,)) for i in range(60)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([], errors)
+        self.assertEqual(60, self.storage.count())
+
+
+class MemoryStorageAdapterTests(TestCase):
+
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.snapshot = path.join(self.directory.name, 'test.snapshot')
+
+        trained = init_bot(database=path.join(self.directory.name, 'trained.sqlite3'))
+        trained.learn_response(Statement("REQUEST~get_projects"), Statement("my projects"))
+        trained.learn_response(Statement("Hello"), Statement("Hi"))
+        trained.learn_response(Statement("Hello"), Statement("Hi"))
+        write_snapshot(trained, self.snapshot)
+        self.statements = dump_statements(trained.storage)
+
+        self.bot = init_bot(storage='memory')
+        self.assertTrue(load_snapshot(self.bot, self.snapshot))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_load_snapshot(self):
+        self.assertEqual(self.statements, dump_statements(self.bot.storage))
+        self.assertEqual(2, self.bot.storage.count())
+
+    def test_filter(self):
+        self.assertEqual(["REQUEST~get_projects"],
+                         [s.text for s in self.bot.storage.filter(in_response_to__contains="my projects")])
+        self.assertEqual([], self.bot.storage.filter(in_response_to=[]))
+        self.assertEqual(2, self.bot.storage.find("Hello").in_response_to[0].occurrence)
+
+    def test_get_response(self):
+        self.assertEqual("Hello", str(self.bot.get_response("Hi")))
+        self.assertEqual({}, {k: v for k, v in self.bot.storage.conversations.items() if v})
+        self.assertEqual(2, self.bot.storage.count())
+
+    def test_teach(self):
+        self.bot.learn_response(Statement("I am Waldur Bot"), Statement("Who are you?"))
+
+        self.assertEqual(3, self.bot.storage.count())
+        self.assertEqual("I am Waldur Bot", str(self.bot.get_response("Who are you?")))
+
+    def test_remove(self):
+        self.bot.storage.remove("REQUEST~get_projects")
+
+        self.assertIsNone(self.bot.storage.find("REQUEST~get_projects"))
+        self.assertEqual([], self.bot.storage.filter(in_response_to__contains="my projects"))
+
+    def test_get_latest_response(self):
+        storage = self.bot.storage
+        conversation = storage.create_conversation()
+        self.assertIsNone(storage.get_latest_response(conversation))
+
+        storage.add_to_conversation(conversation, Statement("Who are you?"), Statement("I am Waldur Bot"))
+        self.assertEqual("Who are you?", storage.get_latest_response(conversation).text)
+
+        storage.remove("Who are you?")
+        self.assertEqual("I am Waldur Bot", storage.get_latest_response(conversation).text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+import pickle
+from collections import OrderedDict
+from os import path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main, mock
+
+from chatterbot.conversation import Statement
+
+from backend.waldur.training import write_snapshot, load_snapshot, dump_statements, trained_fingerprints, ingest
+from backend.waldur.waldur import init_bot, train_bot
+
+
+def corpus(*list_conversations):
+    return OrderedDict([
+        ('waldur', [["Who are you?", "I am Waldur Bot"]]),
+        ('list', list(list_conversations))
+    ])
+
+
+class SnapshotTests(TestCase):
+
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.snapshot = path.join(self.directory.name, 'test.snapshot')
+
+        self.bot = self.new_bot('trained.sqlite3')
+        self.bot.learn_response(Statement("REQUEST~get_projects"), Statement("my projects"))
+        self.bot.learn_response(Statement("Hello"), Statement("Hi"))
+        write_snapshot(self.bot, self.snapshot)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def new_bot(self, database):
+        return init_bot(database=path.join(self.directory.name, database))
+
+    def test_load_into_empty_database(self):
+        bot = self.new_bot('empty.sqlite3')
+
+        self.assertTrue(load_snapshot(bot, self.snapshot))
+        self.assertEqual(dump_statements(self.bot.storage), dump_statements(bot.storage))
+        self.assertEqual(2, len(bot.intent_index))
+        self.assertEqual("REQUEST~get_projects", bot.intent_index.lookup("my projects"))
+
+    def test_load_keeps_taught_statements(self):
+        bot = self.new_bot('taught.sqlite3')
+        bot.learn_response(Statement("I am Waldur Bot"), Statement("Who are you?"))
+
+        self.assertTrue(load_snapshot(bot, self.snapshot))
+        self.assertEqual(3, len(bot.intent_index))
+        self.assertEqual("I am Waldur Bot", bot.intent_index.lookup("Who are you?"))
+
+    def test_no_snapshot(self):
+        self.assertFalse(load_snapshot(self.bot, path.join(self.directory.name, 'missing.snapshot')))
+
+    def test_outdated_snapshot(self):
+        with open(self.snapshot, 'rb') as file:
+            snapshot = pickle.load(file)
+        snapshot['fingerprint'] = 'something else'
+        with open(self.snapshot, 'wb') as file:
+            pickle.dump(snapshot, file)
+
+        self.assertFalse(load_snapshot(self.new_bot('empty.sqlite3'), self.snapshot))
+
+
+class IncrementalTrainingTests(TestCase):
+
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.bot = init_bot(database=path.join(self.directory.name, 'test.sqlite3'))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def train(self, sources):
+        with mock.patch('backend.waldur.waldur.corpus_sources', return_value=sources), \
+                mock.patch('backend.waldur.waldur.ingest', wraps=ingest) as trained:
+            train_bot(self.bot)
+        return [c for args, _ in trained.call_args_list for c in args[1]]
+
+    def test_first_training_trains_everything(self):
+        sources = corpus(["my projects", "REQUEST~get_projects"])
+        self.assertEqual(sources['waldur'] + sources['list'], self.train(sources))
+        self.assertEqual("REQUEST~get_projects", self.bot.intent_index.lookup("my projects"))
+
+        fingerprinted_sources, conversations = trained_fingerprints(self.bot.storage)
+        self.assertEqual({'waldur', 'list'}, set(fingerprinted_sources))
+        self.assertEqual(2, len(conversations))
+
+    def test_unchanged_corpus_is_skipped(self):
+        self.train(corpus(["my projects", "REQUEST~get_projects"]))
+        self.assertEqual([], self.train(corpus(["my projects", "REQUEST~get_projects"])))
+
+    def test_only_new_conversations_are_trained(self):
+        self.train(corpus(["my projects", "REQUEST~get_projects"]))
+        new = ["my vms", "REQUEST~get_vms"]
+        self.assertEqual([new], self.train(corpus(["my projects", "REQUEST~get_projects"], new)))
+        self.assertEqual("REQUEST~get_vms", self.bot.intent_index.lookup("my vms"))
+
+
+if __name__ == '__main__':
+    main()
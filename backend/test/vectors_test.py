@@ -0,0 +1,62 @@
+from unittest import TestCase, main
+
+from backend.waldur.intents import IntentIndex
+from backend.waldur.vectors import VectorScorer, ngrams
+
+
+class VectorScorerTests(TestCase):
+
+    def setUp(self):
+        self.index = IntentIndex()
+        self.index.add("my projects", "REQUEST~get_projects")
+        self.index.add("my vms", "REQUEST~get_vms")
+        self.index.add("Who are you?", "I am Waldur Bot beep boop")
+        self.scorer = VectorScorer(self.index)
+
+    def test_ngrams(self):
+        self.assertEqual({" ab": 1, "ab ": 1}, ngrams("ab"))
+
+    def test_exact_match_has_full_confidence(self):
+        match = self.scorer.match("my projects")
+        self.assertEqual("REQUEST~get_projects", match.response)
+        self.assertEqual(1, match.confidence)
+
+    def test_batch(self):
+        matches = self.scorer.match_batch(["who are you", "give me my vms", "qqqq"])
+        self.assertEqual("I am Waldur Bot beep boop", matches[0].response)
+        self.assertEqual("REQUEST~get_vms", matches[1].response)
+        self.assertIsNone(matches[2])
+
+    def test_rebuilt_after_add(self):
+        self.scorer.match("my vms")
+        self.index.add("Hi", "Hello")
+        self.assertEqual("Hello", self.scorer.match("hi").response)
+
+    def test_added_statements_are_appended(self):
+        self.scorer = VectorScorer(self.index, rebuild_growth=1)
+        self.scorer.match("my vms")
+        self.index.add("Hi", "Hello")
+
+        self.assertEqual("Hello", self.scorer.match("hi").response)
+        self.assertEqual(1, self.scorer.match("hi").confidence)
+        self.assertEqual(3, self.scorer.built_size)
+        self.assertEqual((4, len(self.scorer.vocabulary)), self.scorer.matrix.shape)
+        self.assertEqual("REQUEST~get_projects", self.scorer.match("my projects").response)
+
+    def test_rebuilt_after_growth(self):
+        self.scorer.match("my vms")
+        for i in range(10):
+            self.index.add(f"statement {i}", str(i))
+            self.assertEqual(str(i), self.scorer.match(f"statement {i}").response)
+
+        self.assertGreater(self.scorer.built_size, 3)
+        rebuilt = VectorScorer(self.index)
+        for text in ["my vms", "statement 5", "who are you"]:
+            self.assertEqual(rebuilt.match(text).response, self.scorer.match(text).response)
+
+    def test_empty_index(self):
+        self.assertIsNone(VectorScorer(IntentIndex()).match("hi"))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+from chatterbot.conversation import Statement
+from chatterbot.logic import LogicAdapter
+
+from .vectors import VectorScorer
+
+
+class IntentIndexAdapter(LogicAdapter):
+    """
+    Replacement for chatterbot.logic.BestMatch together with chatterbot.logic.LowConfidenceAdapter.
+    Uses the chatbot's IntentIndex instead of comparing the input to every statement in storage.
+
+    :kwargs:
+        * *threshold* (``float``) --
+          Matches with lower confidence than this are answered with default_response.
+        * *default_response* (``str``) --
+          Response to input that the bot does not understand.
+    """
+
+    def __init__(self, **kwargs):
+        super(IntentIndexAdapter, self).__init__(**kwargs)
+
+        self.confidence_threshold = kwargs.get('threshold', 0.65)
+        self.default_response = kwargs.get('default_response', "I'm sorry, I do not understand.")
+
+    def get_index(self):
+        index = self.chatbot.intent_index
+        if not index.loaded:
+            index.load(self.chatbot.storage)
+        return index
+
+    def can_process(self, statement):
+        return len(self.get_index()) > 0
+
+    def match(self, text):
+        """
+        :param text: input statement text
+        :return: intents.Match or None
+        """
+        return self.get_index().match(text)
+
+    def process(self, input_statement):
+        match = self.match(input_statement.text)
+
+        if match is None or match.confidence < self.confidence_threshold:
+            response = Statement(self.default_response)
+            response.confidence = 1
+        else:
+            self.logger.info(f'Using "{match.prompt}" as a close match to "{input_statement.text}"')
+            response = Statement(match.response)
+            response.confidence = match.confidence
+
+        return response
+
+
+class VectorScorerAdapter(IntentIndexAdapter):
+    """
+    IntentIndexAdapter that scores the input against all statements with vectors.VectorScorer.
+    Takes the same kwargs as IntentIndexAdapter.
+    """
+
+    def __init__(self, **kwargs):
+        super(VectorScorerAdapter, self).__init__(**kwargs)
+        self.scorer = None
+
+    def match(self, text):
+        if self.scorer is None:
+            self.scorer = VectorScorer(self.get_index())
+        return self.scorer.match(text)
@@ -0,0 +1,108 @@
+import re
+from collections import deque
+from logging import getLogger
+
+from common.cache import LRUCache
+from .nltk_resources import stopwords
+
+log = getLogger(__name__)
+
+token_regex = re.compile(r"\w+|[^\w\s]")
+
+
+def tokenize(text):
+    """
+    :param text: name or user input
+    :return: list of lowercase words and punctuation marks in text
+    """
+    return token_regex.findall(text.lower())
+
+
+class Gazetteer(object):
+    """
+    Aho-Corasick automaton over the words of known names, e.g. the user's organisations, projects and VMs.
+    Finds all known names in user input in one pass over its words, regardless of their case.
+    """
+
+    def __init__(self, names):
+        """
+        :param names: list of names from API, names consisting only of stopwords are ignored
+        """
+        self.names = list(names)
+        self.goto = [{}]            # [{word: state, ...}, ...]
+        self.fail = [0]             # [state, ...]
+        self.output = [[]]          # [[(number of words, id of name), ...], ...]
+
+        stop = set(stopwords())
+        for i, name in enumerate(self.names):
+            words = tokenize(name)
+            if words and not all(word in stop for word in words):
+                self._add(words, i)
+        self._link()
+
+    def _add(self, words, i):
+        state = 0
+        for word in words:
+            if word not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[state][word] = len(self.goto) - 1
+            state = self.goto[state][word]
+        # of names with the same words, the first one is kept
+        if not self.output[state]:
+            self.output[state].append((len(words), i))
+
+    def _link(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and word not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(word, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def find(self, text):
+        """
+        :param text: user input
+        :return: list of known names in text in the order they appear, longest names first where they overlap
+        """
+        matches = []
+        state = 0
+        for position, word in enumerate(tokenize(text)):
+            while state and word not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(word, 0)
+            for length, i in self.output[state]:
+                matches.append((position - length + 1, -length, i))
+
+        names = []
+        end = 0
+        for start, length, i in sorted(matches):
+            if start >= end:
+                names.append(self.names[i])
+                end = start - length
+        return names
+
+    def __len__(self):
+        return len(self.names)
+
+
+# {tuple of names: Gazetteer, ...}
+gazetteers = LRUCache(64)
+
+
+def get_gazetteer(names):
+    """
+    :param names: list of names from API
+    :return: Gazetteer of names, built once for every distinct list
+    """
+    key = tuple(names)
+    gazetteer = gazetteers.get(key)
+    if gazetteer is None:
+        gazetteer = Gazetteer(key)
+        gazetteers.put(key, gazetteer)
+    return gazetteer
@@ -0,0 +1,298 @@
+import heapq
+import re
+from collections import defaultdict, namedtuple
+from difflib import SequenceMatcher
+from logging import getLogger
+from math import log as ln
+from threading import RLock
+
+from . import offload
+from .lsh import MinHashLSH
+
+log = getLogger(__name__)
+
+# Result of IntentIndex.match
+# prompt - known statement closest to the query
+# response - first known response to prompt
+# confidence - similarity of query and prompt, same scale as chatterbot's levenshtein_distance
+Match = namedtuple('Match', ['prompt', 'response', 'confidence'])
+
+token_regex = re.compile(r"[a-z0-9]+")
+punctuation = ".,;:!?\"'()"
+
+
+def normalize(text):
+    """
+    Normalized form of a statement, used for comparing statements to each other
+    :param text: statement as string
+    :return: lowercase text with consecutive whitespace collapsed
+    """
+    return " ".join(text.lower().split())
+
+
+def canonical(text):
+    """
+    Key of a statement in the exact match table, ignores case, whitespace and punctuation
+    :param text: statement as string
+    :return: alphanumeric tokens of text joined with spaces
+    """
+    return " ".join(token_regex.findall(text.lower()))
+
+
+def same_word(word, name_word):
+    """
+    :return: True if word of a query is name_word, ignoring punctuation around it
+    """
+    return word == name_word or word.strip(punctuation) == name_word
+
+
+def strip_names(text, names):
+    """
+    Normalized form of a query with names removed, the input of the matchers and the key of the response cache.
+    Query is split into words once and only the words where an extracted name occurs are dropped,
+    one occurrence per extracted name, so "Alpha" is kept in "status of Alpha Beta Alpha" when "Alpha Beta" is extracted.
+    Names are extracted after stopwords are removed, so a name that is not found as consecutive words,
+    e.g. "VM Alpha Beta" in "state of VM Alpha in Beta", has its words dropped one by one in the same order.
+    Other words are kept as they are, so "VM1" is not touched when "VM" is extracted.
+    :param text: query as string
+    :param names: names extracted from text, in the order they occur
+    :return: normalized text without the words of names
+    """
+    words = text.split()
+    masked = [False] * len(words)
+
+    for name in names:
+        name_words = name.split()
+        length = len(name_words)
+        for start in range(len(words) - length + 1):
+            span = range(start, start + length)
+            if not any(masked[i] for i in span) and all(
+                    same_word(words[i], word) for i, word in zip(span, name_words)):
+                break
+        else:
+            # words of the name with stopwords in between, each is the next unmasked match after the previous one
+            span = []
+            i = 0
+            for word in name_words:
+                while i < len(words) and (masked[i] or not same_word(words[i], word)):
+                    i += 1
+                if i == len(words):
+                    break
+                span.append(i)
+                i += 1
+
+        for i in span:
+            masked[i] = True
+
+    return " ".join(word for word, mask in zip(words, masked) if not mask).lower()
+
+
+def tokenize(text):
+    """
+    :param text: normalized statement
+    :return: set of alphanumeric tokens in text
+    """
+    return set(token_regex.findall(text))
+
+
+def similarity(matcher, text):
+    """
+    Same measure as chatterbot.comparisons.levenshtein_distance, which compares the input to the known statement.
+    SequenceMatcher.ratio depends on the order of the sequences, so the query stays seq1 as it is in chatterbot.
+    :param matcher: SequenceMatcher with the query already set as seq1
+    :param text: normalized statement to compare the query to
+    :return: similarity rounded to 2 decimal places
+    """
+    matcher.set_seq2(text)
+    return round(matcher.ratio(), 2)
+
+
+def most_similar(query, texts):
+    """
+    CPU-bound part of IntentIndex.match, run in a worker process if offload is started
+    :param query: normalized query
+    :param texts: normalized statements
+    :return: (position of the statement most similar to query in texts, similarity), (None, 0) if texts is empty
+    """
+    matcher = SequenceMatcher(None, query, "")
+    best = None
+    best_confidence = 0
+    for position, text in enumerate(texts):
+        confidence = similarity(matcher, text)
+        if confidence > best_confidence:
+            best, best_confidence = position, confidence
+    return best, best_confidence
+
+
+class IntentIndex(object):
+    """
+    In-memory index of all statements the bot knows a response to.
+    Only statements sharing the rarest tokens with the query or falling into the same MinHashLSH buckets are compared
+    to it, so matching does not scan the whole database like chatterbot.logic.BestMatch does.
+    Statements that are known word for word are answered from a hash table without any matching.
+    """
+
+    def __init__(self, max_candidates=50, max_frequency=0.05):
+        """
+        :param max_candidates: how many best candidates from the token index and from the LSH index
+                               to compare to the query
+        :param max_frequency: share of statements a token can be in before it is ignored in queries with rarer tokens,
+                              tokens in at most max_candidates statements are never ignored
+        """
+        self.max_candidates = max_candidates
+        self.max_frequency = max_frequency
+        self.lock = RLock()
+        self.loaded = False
+        self.exact_hits = 0
+        self.exact_misses = 0
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.prompts = []               # [prompt, ...]
+            self.normalized = []            # [normalized prompt, ...]
+            self.responses = []             # [[response, ...], ...]
+            self.ids = {}                   # {prompt: id, ...}
+            self.exact = {}                 # {canonical prompt: id, ...}
+            self.postings = defaultdict(set)  # {token: {id, ...}, ...}
+            self.lsh = MinHashLSH()
+            self.loaded = False
+
+    def load(self, storage):
+        """
+        (Re)builds the index from all statements in chatterbot storage
+        :param storage: chatterbot StorageAdapter
+        :return: self
+        """
+        with self.lock:
+            self.clear()
+            for statement in storage.filter():
+                for prompt in statement.in_response_to:
+                    self.add(prompt.text, statement.text)
+            self.loaded = True
+
+        log.info(f"Intent index loaded with {len(self)} statements")
+        return self
+
+    def restore(self, other):
+        """
+        Replaces contents of this index with the contents of other, e.g. an index read from a snapshot
+        :param other: IntentIndex
+        """
+        with self.lock:
+            state = other.__getstate__()
+            state.pop('exact_hits')
+            state.pop('exact_misses')
+            self.__dict__.update(state)
+
+        log.info(f"Intent index restored with {len(self)} statements")
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = RLock()
+
+    def add(self, prompt, response):
+        """
+        Adds response as a known response to prompt
+        :param prompt: statement text
+        :param response: response text
+        """
+        with self.lock:
+            if prompt in self.ids:
+                responses = self.responses[self.ids[prompt]]
+                if response not in responses:
+                    responses.append(response)
+                return
+
+            i = len(self.prompts)
+            normalized = normalize(prompt)
+            self.ids[prompt] = i
+            self.prompts.append(prompt)
+            self.normalized.append(normalized)
+            self.responses.append([response])
+            self.exact.setdefault(canonical(prompt), i)
+            for token in tokenize(normalized):
+                self.postings[token].add(i)
+            self.lsh.add(i, normalized)
+
+    def lookup(self, text):
+        """
+        Exact match fast path, to be checked before consulting the chatbot
+        :param text: query
+        :return: first response to the known statement with the same canonical form as text, None if not known
+        """
+        key = canonical(text)
+
+        with self.lock:
+            if not self.loaded:
+                return None
+
+            i = self.ids.get(text)
+            if i is None:
+                i = self.exact.get(key)
+            if i is None:
+                self.exact_misses += 1
+                return None
+
+            self.exact_hits += 1
+            return self.responses[i][0]
+
+    def candidates(self, query):
+        """
+        :param query: normalized query
+        :return: ids of at most max_candidates prompts sharing the most (idf weighted) tokens with the query
+                 and at most max_candidates prompts sharing the most LSH buckets with it
+        """
+        total = len(self.prompts)
+        postings = [posting for posting in map(self.postings.get, tokenize(query)) if posting]
+
+        # tokens like "my" are in most statements, scoring them would visit most of the index for every query
+        cutoff = max(self.max_candidates, self.max_frequency * total)
+        rare = [posting for posting in postings if len(posting) <= cutoff]
+        if rare:
+            postings = rare
+
+        weights = defaultdict(float)
+        for posting in postings:
+            weight = ln(1 + total / len(posting))
+            for i in posting:
+                weights[i] += weight
+
+        return sorted(self._best(weights) | self._best(self.lsh.query(query)))
+
+    def _best(self, scores):
+        """
+        :param scores: {id: score, ...}
+        :return: set of at most max_candidates ids with the highest scores
+        """
+        if len(scores) <= self.max_candidates:
+            return set(scores)
+        return set(heapq.nlargest(self.max_candidates, scores, key=lambda i: (scores[i], -i)))
+
+    def match(self, text):
+        """
+        Finds the known statement closest to text
+        :param text: query
+        :return: Match or None if no known statement shares a token or an LSH bucket with text
+        """
+        query = normalize(text)
+
+        with self.lock:
+            ids = self.candidates(query)
+            texts = [self.normalized[i] for i in ids]
+
+        best, confidence = offload.run(most_similar, query, texts)
+        if best is None:
+            return None
+
+        with self.lock:
+            i = ids[best]
+            return Match(self.prompts[i], self.responses[i][0], confidence)
+
+    def __len__(self):
+        return len(self.prompts)
@@ -3,7 +3,7 @@ import dateutil.parser
 from collections import OrderedDict
 from logging import getLogger
 
-from common.request import WaldurConnection, InvalidTokenError
+from common.request import WaldurConnection, InvalidTokenError, with_fields
 from ..nameparser import extract_names, getSimilarNames
 
 log = getLogger(__name__)
@@ -56,30 +56,50 @@ class Request(object):
         self.original = query
         return self
 
-    def request(self, method, endpoint, parameters, data=None):
+    def connection(self):
         """
-        Method to query Waldur API.
-        :return: response from Waldur API
+        :return: WaldurConnection with the token of this request
         """
         # todo figure out how to get this programmatically
         api_url = "https://api.etais.ee/api/"
 
         self.check_token()
 
-        waldur = WaldurConnection(
+        return WaldurConnection(
             api_url=api_url,
             token=self.token
         )
 
-        response = waldur.query(
+    def request(self, method, endpoint, parameters, data=None, fields=None):
+        """
+        Method to query Waldur API.
+        :param fields: names of the fields of returned objects to request, None for all fields
+        :return: response from Waldur API
+        """
+        response = self.connection().query(
             method=method,
             endpoint=endpoint,
-            parameters=parameters,
+            parameters=with_fields(parameters, fields),
             data=data
         )
 
         return response
 
+    def request_all(self, method, endpoint, parameters, data=None, fields=None, prefetch=False):
+        """
+        Method to query all pages of a list from Waldur API.
+        :param fields: names of the fields of returned objects to request, None for all fields
+        :param prefetch: if True, next page is queried while the current one is processed
+        :return: generator of all items of the list, see WaldurConnection.iterate
+        """
+        return self.connection().iterate(
+            method=method,
+            endpoint=endpoint,
+            parameters=with_fields(parameters, fields),
+            data=data,
+            prefetch=prefetch
+        )
+
     def check_token(self, message="Token is missing"):
         if self.token is None:
             raise InvalidTokenError(message)
@@ -116,6 +136,13 @@ class Request(object):
 
 
 class SingleRequest(Request):
+    """
+    Request of a single endpoint.
+    Subclasses may set FIELDS to the fields of returned objects they use, other fields are not requested.
+    """
+
+    FIELDS = None
+
     def __init__(self,
                  method=None,
                  endpoint=None,
@@ -146,7 +173,21 @@ class SingleRequest(Request):
             method=self.method,
             endpoint=self.endpoint,
             parameters=self.parameters,
-            data=self.data
+            data=self.data,
+            fields=type(self).FIELDS
+        )
+
+    def send_all(self, prefetch=False):
+        """
+        :return: generator of the items on all pages of the response, for requests of lists
+        """
+        return super(SingleRequest, self).request_all(
+            method=self.method,
+            endpoint=self.endpoint,
+            parameters=self.parameters,
+            data=self.data,
+            fields=type(self).FIELDS,
+            prefetch=prefetch
         )
 
     def process(self):
@@ -342,6 +383,7 @@ class GetOrganisationsRequest(SingleRequest):
     ID = 4
     NAME = 'get_organisations'
     HELP = 'Please tell me what organisations am I part of.'
+    FIELDS = ['name']
 
     def __init__(self):
         super(GetOrganisationsRequest, self).__init__(
@@ -353,7 +395,7 @@ class GetOrganisationsRequest(SingleRequest):
         )
 
     def process(self):
-        response = self.send()
+        response = self.send_all()
 
         organisations = [organisation['name'] for organisation in response]
 
@@ -385,6 +427,7 @@ class GetProjectsRequest(SingleRequest):
     ID = 2
     NAME = 'get_projects'
     HELP = 'Please show me my current projects.'
+    FIELDS = ['name', 'projects']
 
     def __init__(self):
         super(GetProjectsRequest, self).__init__(
@@ -396,7 +439,7 @@ class GetProjectsRequest(SingleRequest):
         )
 
     def process(self):
-        response = self.send()
+        response = self.send_all()
 
         len_all = 0
         statement = ""
@@ -425,6 +468,7 @@ class GetServicesRequest(SingleRequest):
     ID = 1
     NAME = 'get_services'
     HELP = 'What service providers do I have access to?'
+    FIELDS = ['name']
 
     def __init__(self):
         super(GetServicesRequest, self).__init__(
@@ -436,7 +480,7 @@ class GetServicesRequest(SingleRequest):
         )
 
     def process(self):
-        response = self.send()
+        response = self.send_all()
 
         services = set([service['name'] for service in response])
 
@@ -468,6 +512,7 @@ class GetServicesByOrganisationRequest(SingleRequest):
     ID = 6
     NAME = 'get_services_by_organisation'
     HELP = 'Please give me my service providers in organisation <org_name>.'
+    FIELDS = ['name']
 
     def __init__(self):
         super(GetServicesByOrganisationRequest, self).__init__(
@@ -486,7 +531,7 @@ class GetServicesByOrganisationRequest(SingleRequest):
         organisations_with_uuid = firstreq.process()
         organisations = [x for x in organisations_with_uuid]
 
-        extracted_organisations = extract_names(self.original)
+        extracted_organisations = extract_names(self.original, organisations)
 
         if len(extracted_organisations) == 0:
             response_statement = "Sorry, I wasn't able to find an organisation's name in your request! " \
@@ -500,7 +545,7 @@ class GetServicesByOrganisationRequest(SingleRequest):
             else:
 
                 self.parameters["customer"] = organisations_with_uuid[most_similar]
-                response = self.send()
+                response = self.send_all()
 
                 service_names = set([service['name'] for service in response])
 
@@ -533,6 +578,7 @@ class GetServicesByProjectAndOrganisationRequest(SingleRequest):
     ID = 14
     NAME = 'get_services_by_project_and_organisation'
     HELP = 'Please give me my service providers in project <p_name> of organisation <org_name>.'
+    FIELDS = ['services']
 
     def __init__(self):
         super(GetServicesByProjectAndOrganisationRequest, self).__init__(
@@ -623,6 +669,8 @@ class GetVmInfoRequest(SingleRequest):
     ID = 17
     NAME = 'get_vm_info'
     HELP = 'What\'s the state of virtual machine \<vm_name>?'
+    FIELDS = ['customer_name', 'project_name', 'service_name', 'internal_ips', 'external_ips',
+              'security_groups', 'state']
 
     def __init__(self):
         super(GetVmInfoRequest, self).__init__(
@@ -638,7 +686,7 @@ class GetVmInfoRequest(SingleRequest):
         vms_with_uuid = firstreq.process()
         vms = [x for x in vms_with_uuid]
 
-        extracted_vms = extract_names(self.original)
+        extracted_vms = extract_names(self.original, vms)
 
         if len(extracted_vms) == 0:
             response_statement = "Sorry, I wasn't able to find a virtual machine's name in your request! " \
@@ -679,6 +727,7 @@ class GetVmsRequest(SingleRequest):
     ID = 3
     NAME = 'get_vms'
     HELP = 'What virtual machines do I have?'
+    FIELDS = ['name', 'customer_name', 'internal_ips', 'external_ips']
 
     def __init__(self):
         super(GetVmsRequest, self).__init__(
@@ -690,7 +739,7 @@ class GetVmsRequest(SingleRequest):
         )
 
     def process(self):
-        response = self.send()
+        response = self.send_all(prefetch=True)
 
         len_all = 0
         statement = ""
@@ -724,6 +773,7 @@ class GetVmsByOrganisationRequest(SingleRequest):
     ID = 8
     NAME = 'get_vms_by_organisation'
     HELP = 'Can you show me which virtual machines is my organisation <org_name> using?'
+    FIELDS = ['name', 'internal_ips', 'external_ips']
 
     def __init__(self):
         super(GetVmsByOrganisationRequest, self).__init__(
@@ -742,7 +792,7 @@ class GetVmsByOrganisationRequest(SingleRequest):
         organisations_with_uuid = firstreq.process()
         organisations = [x for x in organisations_with_uuid]
 
-        extracted_organisations = extract_names(self.original)
+        extracted_organisations = extract_names(self.original, organisations)
 
         if len(extracted_organisations) == 0:
             response_statement = "Sorry, I wasn't able to find an organisation's name in your request! " \
@@ -756,7 +806,7 @@ class GetVmsByOrganisationRequest(SingleRequest):
             else:
 
                 self.parameters["customer"] = organisations_with_uuid[most_similar]
-                response = self.send()
+                response = self.send_all()
 
                 vm_names = {
                     vm['name'] + ": " + (
@@ -785,6 +835,7 @@ class GetVmsByProjectAndOrganisationRequest(SingleRequest):
     ID = 15
     NAME = 'get_vms_by_project_and_organisation'
     HELP = 'What virtual machines do I have in project <p_name> of organisation <org_name>?'
+    FIELDS = ['name', 'internal_ips', 'external_ips']
 
     def __init__(self):
         super(GetVmsByProjectAndOrganisationRequest, self).__init__(
@@ -837,7 +888,7 @@ class GetVmsByProjectAndOrganisationRequest(SingleRequest):
                 else:
 
                     self.parameters["project"] = projects_with_uuid[most_similar_project]
-                    response = self.send()
+                    response = self.send_all()
 
                     vm_names = {
                         vm['name'] + ": " + (
@@ -868,6 +919,7 @@ class GetPrivateCloudsRequest(SingleRequest):
     ID = 9
     NAME = 'get_private_clouds'
     HELP = 'Please give me my private clouds.'
+    FIELDS = ['name', 'customer_name']
 
     def __init__(self):
         super(GetPrivateCloudsRequest, self).__init__(
@@ -879,7 +931,7 @@ class GetPrivateCloudsRequest(SingleRequest):
         )
 
     def process(self):
-        response = self.send()
+        response = list(self.send_all(prefetch=True))
 
         clouds = [cloud['name'] for cloud in response]
 
@@ -913,6 +965,7 @@ class GetPrivateCloudsByOrganisationRequest(SingleRequest):
     ID = 11
     NAME = 'get_private_clouds_by_organisation'
     HELP = 'What private clouds do I have in organisation <org_name>?'
+    FIELDS = ['name']
 
     def __init__(self):
         super(GetPrivateCloudsByOrganisationRequest, self).__init__(
@@ -931,7 +984,7 @@ class GetPrivateCloudsByOrganisationRequest(SingleRequest):
         organisations_with_uuid = firstreq.process()
         organisations = [x for x in organisations_with_uuid]
 
-        extracted_organisations = extract_names(self.original)
+        extracted_organisations = extract_names(self.original, organisations)
 
         if len(extracted_organisations) == 0:
             response_statement = "Sorry, I wasn't able to find an organisation's name in your request! " \
@@ -944,7 +997,7 @@ class GetPrivateCloudsByOrganisationRequest(SingleRequest):
                                                                     "organisation with that name exists."
             else:
                 self.parameters["customer"] = organisations_with_uuid[most_similar]
-                response = self.send()
+                response = self.send_all()
                 response_statement = self.subprocess(response, most_similar)
 
         return {
@@ -982,6 +1035,7 @@ class GetPrivateCloudsByProjectAndOrganisationRequest(SingleRequest):
     ID = 16
     NAME = 'get_private_clouds_by_project_and_organisation'
     HELP = 'Could you list all my private clouds in project <p_name> of organisation <org_name>?'
+    FIELDS = ['name']
 
     def __init__(self):
         super(GetPrivateCloudsByProjectAndOrganisationRequest, self).__init__(
@@ -1034,7 +1088,7 @@ class GetPrivateCloudsByProjectAndOrganisationRequest(SingleRequest):
                 else:
 
                     self.parameters["project"] = projects_with_uuid[most_similar_project]
-                    response = self.send()
+                    response = self.send_all()
 
                     clouds = [cloud["name"] for cloud in response]
 
@@ -1089,7 +1143,7 @@ class GetAuditLogByOrganisationRequest(SingleRequest):
         organisations_with_uuid = firstreq.process()
         organisations = [x for x in organisations_with_uuid]
 
-        extracted_organisations = extract_names(self.original)
+        extracted_organisations = extract_names(self.original, organisations)
 
         if len(extracted_organisations) == 0:
             response_statement = "Sorry, I wasn't able to find an organisation's name in your request! " \
@@ -1152,7 +1206,7 @@ class GetAuditLogByProjectRequest(SingleRequest):
         projects_with_uuid = firstreq.process()
         projects = [x for x in projects_with_uuid]
 
-        extracted_projects = extract_names(self.original)
+        extracted_projects = extract_names(self.original, projects)
 
         if len(extracted_projects) == 0:
             response_statement = "Sorry, I wasn't able to find a project's name in your request! " \
@@ -1284,6 +1338,7 @@ class GetTeamOfOrganisationRequest(SingleRequest):
     ID = 10
     NAME = 'get_team_of_organisation'
     HELP = 'Who is working in my organisation <org_name>?'
+    FIELDS = ['full_name', 'email', 'role']
 
     def __init__(self):
         super(GetTeamOfOrganisationRequest, self).__init__(
@@ -1302,7 +1357,7 @@ class GetTeamOfOrganisationRequest(SingleRequest):
         organisations_with_uuid = firstreq.process()
         organisations = [x for x in organisations_with_uuid]
 
-        extracted_organisations = extract_names(self.original)
+        extracted_organisations = extract_names(self.original, organisations)
 
         if len(extracted_organisations) == 0:
             response_statement = "Sorry, I wasn't able to find an organisation's name in your request! " \
@@ -1316,7 +1371,7 @@ class GetTeamOfOrganisationRequest(SingleRequest):
             else:
 
                 self.endpoint += "/" + organisations_with_uuid[most_similar] + "/users/"
-                response = self.send()
+                response = list(self.send_all())
 
                 owners = [owner['full_name'] + ": " + (owner["email"] if owner["email"] != None else "-") for owner in
                           response if owner["role"] == "owner" and
@@ -1355,6 +1410,7 @@ class GetTotalCostGraphRequest(SingleRequest):
     ID = 5
     NAME = 'get_totalcosts'
     HELP = 'Please tell me the monthly costs in my organisation <organisation name>.'
+    FIELDS = ['month', 'year', 'total']
 
     def __init__(self):
         super(GetTotalCostGraphRequest, self).__init__(
@@ -1370,7 +1426,7 @@ class GetTotalCostGraphRequest(SingleRequest):
         organisations_with_uuid = firstreq.process()
         organisations = [x for x in organisations_with_uuid]
 
-        extracted_organisations = extract_names(self.original)
+        extracted_organisations = extract_names(self.original, organisations)
 
         response_type = 'text'
 
@@ -1658,6 +1714,8 @@ class GetHelpRequest(SingleRequest):
 
 
 class GetPossibleImages(SingleRequest):
+    FIELDS = ['name', 'url']
+
     def __init__(self, settings_uuid):
         super().__init__(
             'GET',
@@ -1668,10 +1726,12 @@ class GetPossibleImages(SingleRequest):
         )
 
     def process(self):
-        return {image['name']: image['url'] for image in self.send()}
+        return {image['name']: image['url'] for image in self.send_all()}
 
 
 class GetPossibleFlavors(SingleRequest):
+    FIELDS = ['name', 'url']
+
     def __init__(self, settings_uuid):
         super().__init__(
             'GET',
@@ -1682,10 +1742,12 @@ class GetPossibleFlavors(SingleRequest):
         )
 
     def process(self):
-        return {flavor['name']: flavor['url'] for flavor in self.send()}
+        return {flavor['name']: flavor['url'] for flavor in self.send_all()}
 
 
 class GetPossibleKeys(SingleRequest):
+    FIELDS = ['name', 'url']
+
     def __init__(self):
         super().__init__(
             'GET',
@@ -1693,10 +1755,12 @@ class GetPossibleKeys(SingleRequest):
         )
 
     def process(self):
-        return {key['name']: key['url'] for key in self.send()}
+        return {key['name']: key['url'] for key in self.send_all()}
 
 
 class GetPossibleNetworks(SingleRequest):
+    FIELDS = ['name', 'url']
+
     def __init__(self, settings_uuid):
         super().__init__(
             'GET',
@@ -1707,10 +1771,12 @@ class GetPossibleNetworks(SingleRequest):
         )
 
     def process(self):
-        return {network['name']: network['url'] for network in self.send()}
+        return {network['name']: network['url'] for network in self.send_all()}
 
 
 class GetSecurityGroups(SingleRequest):
+    FIELDS = ['name', 'url']
+
     def __init__(self, settings_uuid):
         super().__init__(
             'GET',
@@ -1721,10 +1787,12 @@ class GetSecurityGroups(SingleRequest):
         )
 
     def process(self):
-        return {group['name']: {'value': group['url']} for group in self.send()}
+        return {group['name']: {'value': group['url']} for group in self.send_all()}
 
 
 class GetPossibleProjects(SingleRequest):
+    FIELDS = ['project_name', 'url', 'service_uuid']
+
     def __init__(self):
         super().__init__(
             'GET',
@@ -1736,11 +1804,13 @@ class GetPossibleProjects(SingleRequest):
             project['project_name']: {
                 'value': project['url'],
                 'settings_uuid': GetSetting(project['service_uuid']).set_token(self.token).process()
-            } for project in self.send()
+            } for project in self.send_all()
         }
 
 
 class GetSetting(SingleRequest):
+    FIELDS = ['settings_uuid']
+
     def __init__(self, service_uuid):
         super().__init__(
             'GET',
@@ -1752,6 +1822,8 @@ class GetSetting(SingleRequest):
 
 
 class GetSystemVolumeSize(SingleRequest):
+    FIELDS = ['min_disk']
+
     def __init__(self, image):
         super().__init__(
             'GET',
@@ -1793,6 +1865,7 @@ class CreateVM(SingleRequest):
 
 class GetOrganisationsAndIdsRequest(SingleRequest):
     NAME = 'util_get_organisations'
+    FIELDS = ['name', 'uuid']
 
     def __init__(self):
         super(GetOrganisationsAndIdsRequest, self).__init__(
@@ -1801,13 +1874,14 @@ class GetOrganisationsAndIdsRequest(SingleRequest):
         )
 
     def process(self):
-        response = self.send()
+        response = self.send_all()
 
         return {organisation['name']: organisation["uuid"] for organisation in response}
 
 
 class GetProjectsAndIdsRequest(SingleRequest):
     NAME = 'util_get_organisations'
+    FIELDS = ['name', 'uuid']
 
     def __init__(self):
         super(GetProjectsAndIdsRequest, self).__init__(
@@ -1819,13 +1893,14 @@ class GetProjectsAndIdsRequest(SingleRequest):
         )
 
     def process(self):
-        response = self.send()
+        response = self.send_all()
 
         return {project['name']: project["uuid"] for project in response}
 
 
 class GetVmsAndIdsRequest(SingleRequest):
     NAME = 'util_get_vms'
+    FIELDS = ['name', 'uuid']
 
     def __init__(self):
         super(GetVmsAndIdsRequest, self).__init__(
@@ -1837,13 +1912,14 @@ class GetVmsAndIdsRequest(SingleRequest):
         )
 
     def process(self):
-        response = self.send()
+        response = self.send_all(prefetch=True)
 
         return {vm['name']: vm["uuid"] for vm in response}
 
 
 class GetProjectsAndIdsByOrganisationRequest(SingleRequest):
     NAME = 'util_get_projects_by_organisation'
+    FIELDS = ['name', 'uuid']
 
     def __init__(self):
         super(GetProjectsAndIdsByOrganisationRequest, self).__init__(
@@ -1855,7 +1931,7 @@ class GetProjectsAndIdsByOrganisationRequest(SingleRequest):
         )
 
     def process(self):
-        response = self.send()
+        response = self.send_all()
 
         return {project['name']: project["uuid"] for project in response}
 
@@ -0,0 +1,84 @@
+from collections import defaultdict
+from zlib import crc32
+
+import numpy as np
+
+# Mersenne prime of the universal hash functions (a * hash + b) % PRIME approximating random permutations,
+# a < 2 ** 31 and crc32 < 2 ** 32 so a * hash + b fits in uint64
+PRIME = (1 << 31) - 1
+
+
+def shingles(text, n=3):
+    """
+    :param text: normalized statement
+    :param n: length of shingles
+    :return: set of character n-grams in text, padded with a space on both ends
+    """
+    text = " " + text + " "
+    return {text[i:i + n] for i in range(max(len(text) - n + 1, 1))}
+
+
+class MinHashLSH(object):
+    """
+    Locality-sensitive hashing index of statements by their MinHash signatures over character shingles.
+    Statements whose shingle sets have a Jaccard similarity above about (1 / bands) ** (1 / rows)
+    are likely to share a bucket in at least one band, so similar statements are found without scanning all of them,
+    including misspelled ones that share no whole word with the query.
+    Hashing is deterministic, an index can be pickled and used in another process.
+    """
+
+    def __init__(self, bands=20, rows=3, n=3, seed=1):
+        """
+        :param bands: number of bands, more bands find less similar statements
+        :param rows: signature values per band, more rows find only more similar statements
+        :param n: length of character shingles
+        :param seed: seed of the permutations
+        """
+        self.bands = bands
+        self.rows = rows
+        self.n = n
+
+        random = np.random.RandomState(seed)
+        size = bands * rows
+        self.a = random.randint(1, PRIME, size=size, dtype=np.uint64)
+        self.b = random.randint(0, PRIME, size=size, dtype=np.uint64)
+
+        self.buckets = defaultdict(set)     # {(band, band signature): {id, ...}, ...}
+
+    def signature(self, text):
+        """
+        :param text: normalized statement
+        :return: MinHash signature of text, uint64 array of bands * rows values
+        """
+        hashes = np.array([crc32(s.encode('utf-8')) for s in shingles(text, self.n)], dtype=np.uint64)
+        return ((np.outer(hashes, self.a) + self.b) % PRIME).min(axis=0)
+
+    def keys(self, text):
+        """
+        :param text: normalized statement
+        :return: bucket of text in every band
+        """
+        signature = self.signature(text)
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def add(self, i, text):
+        """
+        :param i: id of statement
+        :param text: normalized statement
+        """
+        for key in self.keys(text):
+            self.buckets[key].add(i)
+
+    def query(self, text):
+        """
+        :param text: normalized query
+        :return: {id: number of bands the statement shares a bucket with text in, ...}
+        """
+        counts = defaultdict(int)
+        for key in self.keys(text):
+            for i in self.buckets.get(key, ()):
+                counts[i] += 1
+        return counts
+
+    def clear(self):
+        self.buckets.clear()
@@ -1,16 +1,150 @@
-import nltk
-import difflib
 import re
-from nltk.corpus import stopwords
+from collections import defaultdict
+from contextlib import contextmanager
 from logging import getLogger
+from threading import Lock
+from time import perf_counter
+
+from common.cache import LRUCache
+from .nltk_resources import load_nltk, load_sentence_tokenizer, load_tagger, stopwords, MissingNLTKDataError
+from . import offload
+from .gazetteer import get_gazetteer
+from .rules import get_rule_extractor
+from .similarity import get_name_index, get_vector_matcher
 
 log = getLogger(__name__)
 
-# Stopwords
-nltk.download("punkt")
-nltk.download('averaged_perceptron_tagger')
-nltk.download("stopwords")
-stop = stopwords.words('english')
+# NNP - proper noun, CC - coordinating conjunction
+chunk_grammar = r"""Chunk: {<NNP>+<CC>?<NNP>*}"""
+name_regex = re.compile(r"([A-Z\d]\S+(?=\s?[A-Z\d]?)(?:\s?[A-Z\d]\S+)*)")
+
+
+class NamePipeline(object):
+    """
+    Everything name extraction needs, built once per process, see get_pipeline.
+    Tokenizer and tagger are loaded on first use, so extract_names_regex works with only the stopwords downloaded.
+    Time spent in every stage is recorded, see stats.
+    """
+
+    def __init__(self):
+        self.nltk = load_nltk()
+        self.stop = frozenset(stopwords())
+        self.chunker = self.nltk.RegexpParser(chunk_grammar)
+        self.lock = Lock()
+        self.timings = defaultdict(lambda: [0, 0.0])    # {stage: [calls, seconds], ...}
+        self._sentence_tokenizer = None
+        self._tagger = None
+
+    @property
+    def sentence_tokenizer(self):
+        if self._sentence_tokenizer is None:
+            self._sentence_tokenizer = load_sentence_tokenizer()
+        return self._sentence_tokenizer
+
+    @property
+    def tagger(self):
+        if self._tagger is None:
+            self._tagger = load_tagger()
+        return self._tagger
+
+    @contextmanager
+    def timed(self, stage):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = perf_counter() - start
+            with self.lock:
+                timing = self.timings[stage]
+                timing[0] += 1
+                timing[1] += elapsed
+
+    def stats(self):
+        """
+        :return: {stage: {'calls': number of calls, 'time': total seconds}, ...}
+        """
+        with self.lock:
+            return {stage: {'calls': calls, 'time': time} for stage, (calls, time) in self.timings.items()}
+
+    def remove_stopwords(self, sentences):
+        """
+        :param sentences: User input as string
+        :return: sentences with first letter lowercased and stopwords removed
+        """
+        with self.timed('stopwords'):
+            sentences = sentences[0].lower() + sentences[1:]
+            return " ".join([i for i in sentences.split() if i.lower() not in self.stop])
+
+    def tag(self, sentences):
+        """
+        :param sentences: User input as string
+        :return: pos-tagged words of every sentence
+        """
+        sentences = self.remove_stopwords(sentences)
+        with self.timed('tokenizing'):
+            tokenized_sentences = self.sentence_tokenizer.tokenize(sentences)
+            tokenized_words = [self.nltk.word_tokenize(sent, preserve_line=True) for sent in tokenized_sentences]
+        with self.timed('tagging'):
+            return [self.tagger.tag(words) for words in tokenized_words]
+
+    def chunk(self, tagged_sentences):
+        """
+        :param tagged_sentences: output of tag
+        :return: list of names
+        """
+        with self.timed('chunking'):
+            names = []
+            for tagged_sentence in tagged_sentences:
+                for chunk in self.chunker.parse(tagged_sentence):
+                    if isinstance(chunk, self.nltk.tree.Tree):
+                        names.append(' '.join([c[0] for c in chunk]))
+            return names
+
+    def find_names(self, sentences):
+        """
+        :param sentences: User input as string
+        :return: list of strings in capital case or starting with a number
+        """
+        sentences = self.remove_stopwords(sentences)
+        with self.timed('regex'):
+            return name_regex.findall(sentences)
+
+
+_pipeline = None
+_pipeline_lock = Lock()
+
+# Engines getSimilarNames can use, see set_name_matcher
+name_matchers = {
+    # difflib on a shortlist from a trigram index, similarity.NameIndex
+    'trigram': get_name_index,
+    # cosine similarity of trigram vectors with numpy, similarity.VectorNameMatcher
+    'vector': get_vector_matcher,
+}
+_name_matcher = 'trigram'
+
+# Engines extract_names can use, see set_name_extractor
+name_extractors = [
+    # chunks of proper nouns tagged by the NLTK perceptron tagger, falls back to extract_names_regex
+    'nltk',
+    # capitalization, digits and keywords, rules.RuleExtractor
+    'rules',
+]
+_name_extractor = 'nltk'
+
+# Names extracted from recent inputs, shared by Query and all Requests
+# {(engine of extract_names or 'regex', input): (name, ...), ...}
+extraction_cache = LRUCache(4096)
+
+
+def get_pipeline():
+    """
+    :return: the NamePipeline of this process
+    """
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = NamePipeline()
+        return _pipeline
 
 
 def preprocess(sentences):
@@ -21,84 +155,135 @@ def preprocess(sentences):
     """
     log.info("Preprocessing sentence(s): " + str(sentences))
     try:
-        sentences = sentences[0].lower() + sentences[1:]
-        sentences = " ".join([i for i in sentences.split() if i.lower() not in stop])
-        tokenized_sentences = nltk.sent_tokenize(sentences)
-        tokenized_words = [nltk.word_tokenize(sent) for sent in tokenized_sentences]
-        tagged_sentences = [nltk.pos_tag(word) for word in tokenized_words]
+        tagged_sentences = get_pipeline().tag(sentences)
         log.info("Sentences preprocessed.")
         return tagged_sentences
+    except MissingNLTKDataError:
+        raise
     except Exception as e:
         log.error("An exception occurred while preprocessing: " + str(e))
 
 
-def extract_names(sentences):
+def tag_and_chunk(sentences):
+    """
+    CPU-bound part of extract_names, run in a worker process if offload is started
+    :param sentences: User input as string
+    :return: list of names found by NLTK
+    """
+    return get_pipeline().chunk(preprocess(sentences))
+
+
+def extract_names(sentences, known_names=None):
     """
     Extracts names from user input
     :param sentences: User input as string
+    :param known_names: Names from API the user may be referring to, looked for in user input before using NLTK
     :return: list of names, stopwords removed
     """
+    if known_names:
+        names = get_gazetteer(known_names).find(sentences)
+        if names:
+            log.info("Following known names found: " + str(names))
+            return names
+
+    if _name_extractor == 'rules':
+        return extract_names_rules(sentences)
+
     # todo: check for a better way of chunking
+    cached = extraction_cache.get(('nltk', sentences))
+    if cached is not None:
+        return list(cached)
+
     try:
         log.info("Extracting names from \"" + str(sentences) + "\".")
-        names = []
-        preprocessed_sentences = preprocess(sentences)
-        for tagged_sentence in preprocessed_sentences:
-            # NNP - proper noun, CC - coordinating conjunction
-            chunkGram = r"""Chunk: {<NNP>+<CC>?<NNP>*}"""
-            chunkParser = nltk.RegexpParser(chunkGram)
-            chunked = chunkParser.parse(tagged_sentence)
-            for chunk in chunked:
-                if type(chunk) == nltk.tree.Tree:
-                    names.append(' '.join([c[0] for c in chunk]))
+        names = offload.run(tag_and_chunk, sentences)
         if len(names) == 0:
             log.info("No names found with NLTK. Falling back to regex.")
-            return extract_names_regex(sentences)
+            names = extract_names_regex(sentences)
         else:
             log.info("Following names extracted: " + str(names))
-            return names
+        extraction_cache.put(('nltk', sentences), tuple(names))
+        return names
+    except MissingNLTKDataError:
+        raise
     except Exception as e:
         log.error("An exception occurred while extracting names: " + str(e))
 
 
+def extract_names_rules(sentences):
+    """
+    Extracts names without part of speech tagging, see rules.RuleExtractor
+    :param sentences: User input as string
+    :return: list of names
+    """
+    cached = extraction_cache.get(('rules', sentences))
+    if cached is not None:
+        return list(cached)
+
+    with get_pipeline().timed('rules'):
+        names = get_rule_extractor().find(sentences)
+    log.info("Following names extracted: " + str(names))
+    extraction_cache.put(('rules', sentences), tuple(names))
+    return names
+
+
 def extract_names_regex(sentences):
     """
     Fallback name extractor. Looks for all strings that are in capital case or start with number.
     :param sentences: The user input
     :return: List of found names
     """
-    sentences = sentences[0].lower() + sentences[1:]
-    sentences = " ".join([i for i in sentences.split() if i.lower() not in stop])
-    name_regex = "([A-Z\d]\S+(?=\s?[A-Z\d]?)(?:\s?[A-Z\d]\S+)*)"
-    names = re.findall(name_regex, sentences)
+    cached = extraction_cache.get(('regex', sentences))
+    if cached is not None:
+        return list(cached)
+
+    names = get_pipeline().find_names(sentences)
     if len(names) == 0 or names == None:
         log.info("Did not find any names.")
-        return []
+        names = []
     else:
         log.info("Following names extracted: " + str(names))
+    extraction_cache.put(('regex', sentences), tuple(names))
     return names
 
 
-def getSimilarNames(extracted_names, list_of_names):
+def set_name_extractor(name):
+    """
+    :param name: one of name_extractors, engine extract_names uses for input without known names
+    """
+    global _name_extractor
+    if name not in name_extractors:
+        raise ValueError(f"Unknown name extractor '{name}', expected one of {name_extractors}")
+    _name_extractor = name
+
+
+def set_name_matcher(name):
+    """
+    :param name: key of name_matchers, engine getSimilarNames uses
+    """
+    global _name_matcher
+    if name not in name_matchers:
+        raise ValueError(f"Unknown name matcher '{name}', expected one of {list(name_matchers)}")
+    _name_matcher = name
+
+
+def getSimilarNames(extracted_names, list_of_names, top=None):
     """
     Compares names extracted from user input with names found from API
     :param extracted_names: Names extracted from user input
     :param list_of_names: Names from API
-    :return: Most similar name, should later return all names with similar confidence as the best
+    :param top: if given, return the top most similar names with their similarity instead
+    :return: Most similar name, "" if no name is more similar than 0.5
+             or [(name, similarity), ...] of at most top names if top is given
     """
-    # todo: Return all names with similar confidence
     # todo: Find a better algorithm for similarity determination
     try:
         log.info("Looking for similar names to " + str(extracted_names) + "in " + str(list_of_names))
-        best = ["", 0]
-        results = []
-        matcher = difflib.SequenceMatcher()
-        for extraction in extracted_names:
-            for name in list_of_names:
-                matcher.set_seqs(extraction.lower(), name.lower())
-                similarity = matcher.ratio()
-                if 0.5 < similarity > best[1]:
-                    best = [name, similarity]
+        results = name_matchers[_name_matcher](list_of_names).most_similar(extracted_names, top or 1)
+        if top is not None:
+            log.info("Found most similar names " + str(results))
+            return results
+        best = results[0] if results else ("", 0)
         log.info("Found most similar name \"" + str(best[0]) + "\" with confidence " + str(best[1]))
         return best[0]
     except Exception as e:
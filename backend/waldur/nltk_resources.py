@@ -0,0 +1,137 @@
+"""
+Lazy loading of nltk and the models nameparser needs.
+Models are only looked up locally, nothing is downloaded at runtime, see backend/download_nltk_data.py.
+Models are looked up in WALDUR_NLTK_DATA (defaults to backend/nltk_data) first and then in nltk's own data path.
+"""
+import os
+from logging import getLogger
+from os import path
+from threading import Lock
+
+log = getLogger(__name__)
+
+DEFAULT_DATA_DIR = path.join(path.dirname(path.dirname(path.abspath(__file__))), 'nltk_data')
+data_dir = os.environ.get('WALDUR_NLTK_DATA', DEFAULT_DATA_DIR)
+
+# nltk 3.9 replaced the pickled models with punkt_tab and averaged_perceptron_tagger_eng
+# {model: {nltk version >= 3.9: (nltk package, resource path), ...}, ...}
+models = {
+    'tokenizer': {
+        True: ('punkt_tab', 'tokenizers/punkt_tab/english/'),
+        False: ('punkt', 'tokenizers/punkt/english.pickle'),
+    },
+    'tagger': {
+        True: ('averaged_perceptron_tagger_eng', 'taggers/averaged_perceptron_tagger_eng/'),
+        False: ('averaged_perceptron_tagger', 'taggers/averaged_perceptron_tagger/averaged_perceptron_tagger.pickle'),
+    },
+    'stopwords': {
+        True: ('stopwords', 'corpora/stopwords'),
+        False: ('stopwords', 'corpora/stopwords'),
+    },
+}
+
+lock = Lock()
+_nltk = None
+_found = set()
+_stopwords = None
+
+
+class MissingNLTKDataError(LookupError):
+    """
+    Raised when a model is not downloaded
+    """
+    pass
+
+
+def load_nltk():
+    """
+    Imports nltk on first use, importing it takes a noticeable part of a second
+    :return: nltk module with data_dir first in its data path
+    """
+    global _nltk
+    with lock:
+        if _nltk is None:
+            import nltk
+            if data_dir not in nltk.data.path:
+                nltk.data.path.insert(0, data_dir)
+            _nltk = nltk
+        return _nltk
+
+
+def package(model):
+    """
+    :param model: key of models
+    :return: (nltk package, resource path) of model for the installed nltk version
+    """
+    nltk = load_nltk()
+    major, minor = (int(x) for x in nltk.__version__.split('.')[:2])
+    return models[model][(major, minor) >= (3, 9)]
+
+
+def require(*names):
+    """
+    Checks that models are downloaded, without loading them
+    :param names: keys of models, all models if none given
+    :raises MissingNLTKDataError: if a model is not downloaded
+    """
+    nltk = load_nltk()
+    for model in names or models:
+        if model in _found:
+            continue
+
+        name, resource = package(model)
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            raise MissingNLTKDataError(
+                f"NLTK model '{name}' is not downloaded, looked in {nltk.data.path}. "
+                f"Download it with 'python download_nltk_data.py' in backend/ or set WALDUR_NLTK_DATA"
+            ) from None
+        _found.add(model)
+
+
+def stopwords():
+    """
+    :return: list of english stopwords, loaded on first use
+    """
+    global _stopwords
+    if _stopwords is None:
+        require('stopwords')
+        from nltk.corpus import stopwords as corpus
+        _stopwords = corpus.words('english')
+    return _stopwords
+
+
+def load_sentence_tokenizer():
+    """
+    :return: english punkt sentence tokenizer, object with tokenize(text) -> [sentence, ...]
+    """
+    require('tokenizer')
+    nltk = load_nltk()
+    if package('tokenizer')[0] == 'punkt_tab':
+        from nltk.tokenize.punkt import PunktTokenizer
+        return PunktTokenizer('english')
+    return nltk.data.load(package('tokenizer')[1])
+
+
+def load_tagger():
+    """
+    :return: tagger nltk.pos_tag uses, object with tag([token, ...]) -> [(token, tag), ...]
+    """
+    require('tagger')
+    from nltk.tag.perceptron import PerceptronTagger
+    return PerceptronTagger()
+
+
+def download(directory=None):
+    """
+    Downloads all models for the installed nltk version
+    :param directory: where to download to, defaults to data_dir
+    """
+    nltk = load_nltk()
+    directory = directory or data_dir
+    for model in models:
+        name, _ = package(model)
+        log.info(f"Downloading NLTK model '{name}' to {directory}")
+        if not nltk.download(name, download_dir=directory, quiet=True, raise_on_error=True):
+            raise MissingNLTKDataError(f"Could not download NLTK model '{name}'")
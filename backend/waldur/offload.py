@@ -0,0 +1,72 @@
+"""
+Optional pool of worker processes for CPU-bound work, so it does not hold the GIL of the threads serving requests.
+Disabled unless start is called, then run executes functions in a worker instead of the calling thread.
+Functions and their arguments must be picklable, workers don't share any state with the server.
+Workers are forked on Linux, so start should be called before the bot is loaded and the server starts its threads.
+"""
+import atexit
+from concurrent.futures import ProcessPoolExecutor
+from logging import getLogger
+from os import getpid
+
+log = getLogger(__name__)
+
+_executor = None
+
+
+def _warm_up():
+    """
+    Loads NLTK models in a worker before it takes any work
+    :return: pid of the worker
+    """
+    from .nameparser import get_pipeline
+    try:
+        pipeline = get_pipeline()
+        pipeline.sentence_tokenizer
+        pipeline.tagger
+    except LookupError as e:
+        log.error(f"Worker {getpid()} could not load NLTK models: {e}")
+    return getpid()
+
+
+def start(processes):
+    """
+    Starts processes workers and waits until all of them have loaded the NLTK models
+    :param processes: number of worker processes
+    """
+    global _executor
+    if _executor is not None:
+        shutdown()
+
+    _executor = ProcessPoolExecutor(max_workers=processes)
+    # a worker that has warmed up can take the task of another one, so tasks are submitted until all have run one
+    warmed_up = set()
+    while len(warmed_up) < processes:
+        tasks = [_executor.submit(_warm_up) for _ in range(processes - len(warmed_up))]
+        warmed_up.update(task.result() for task in tasks)
+    log.info(f"Started {processes} worker processes for NLP")
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+
+
+def enabled():
+    return _executor is not None
+
+
+def run(function, *args):
+    """
+    :param function: module level function
+    :param args: arguments of function
+    :return: function(*args), computed in a worker process if workers are started
+    """
+    if _executor is None:
+        return function(*args)
+    return _executor.submit(function, *args).result()
+
+
+atexit.register(shutdown)
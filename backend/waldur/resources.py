@@ -3,6 +3,7 @@ import logging
 from chatterbot.conversation import Statement
 from flask_restful import Resource
 
+from .intents import strip_names
 from .nameparser import extract_names_regex
 from .parsers import query_parser, teach_parser, auth_parser
 from .logic.requests import Request, text, InputRequest, InvalidTokenError
@@ -74,14 +75,9 @@ class Query(WaldurResource):
 
     def _handle_query(self):
 
-        # Todo: Make it look better
-        names_excluded = self.query
-        for x in extract_names_regex(self.query):
-            for splitted in x.split():
-                names_excluded = names_excluded.replace(splitted, "").strip()
-                names_excluded = " ".join(names_excluded.split())
-        
-        bot_response = str(self.chatbot.get_response(names_excluded))
+        names_excluded = strip_names(self.query, extract_names_regex(self.query))
+
+        bot_response = self._get_bot_response(names_excluded)
         log.debug(f"Bot response: '{bot_response}'")
 
         if bot_response.startswith("REQUEST"):
@@ -98,6 +94,29 @@ class Query(WaldurResource):
         else:
             self.response = text(bot_response)
 
+    def _get_bot_response(self, names_excluded):
+        """
+        :param names_excluded: normalized query without names, see strip_names
+        :return: response of the bot, from its response cache if the same query has been answered before
+        """
+        cache = self.chatbot.response_cache
+
+        bot_response = cache.get(names_excluded)
+        if bot_response is not None:
+            log.debug(f"Cached response for '{names_excluded}', {cache.stats()}")
+            return bot_response
+
+        version = cache.version
+        bot_response = self.chatbot.intent_index.lookup(names_excluded)
+        if bot_response is None:
+            bot_response = str(self.chatbot.get_response(names_excluded))
+        else:
+            log.debug(f"Exact match for '{names_excluded}', "
+                      f"{self.chatbot.intent_index.exact_hits} exact matches so far")
+
+        cache.put(names_excluded, bot_response, version=version)
+        return bot_response
+
     def _handle_input(self):
         req = self.tokens_for_input[self.token]\
             .set_input(self.query)
@@ -132,7 +151,7 @@ class Teach(WaldurResource):
         :return: response, code
         """
 
-        self.chatbot.learn_response(Statement(self.statement), Statement(self.previous_statement))
+        self.chatbot.teach(Statement(self.statement), Statement(self.previous_statement))
         return text(f"Added '{self.statement}' as a response to '{self.previous_statement}'"), 200
 
 
@@ -0,0 +1,132 @@
+"""
+Rule based name extraction, alternative to tagging with NLTK that needs no models besides stopwords.
+A word is part of a name if it contains a digit, is capitalized and does not start a sentence,
+or follows a word like "organisation" or "project" and is not a word the bot is trained on.
+Names end at stopwords, at words like "in" and "project" unless they are capitalized inside a name, and at punctuation.
+"""
+import re
+from logging import getLogger
+from threading import Lock
+
+from .nltk_resources import stopwords
+
+log = getLogger(__name__)
+
+word_regex = re.compile(r"[a-z0-9]+")
+punctuation = ".,;:!?\"'()"
+sentence_end = ".!?"
+
+# Words after which the next words are the name of the entity
+triggers = frozenset([
+    "organisation", "organization", "org", "project", "machine", "vm", "customer", "cloud", "provider",
+    "named", "called",
+])
+# Words that are never part of a name
+boundaries = triggers | frozenset([
+    "in", "of", "for", "from", "using", "organisations", "organizations", "projects",
+    "machines", "vms", "clouds", "providers", "virtual", "private", "service", "services",
+])
+
+
+def vocabulary():
+    """
+    :return: set of lowercase words in the statements the bot is trained on, requests excluded
+    """
+    from .training import corpus_sources
+
+    words = set()
+    for conversations in corpus_sources().values():
+        for conversation in conversations:
+            for statement in conversation:
+                if not statement.startswith("REQUEST"):
+                    words.update(word_regex.findall(statement.lower()))
+    return words
+
+
+class RuleExtractor(object):
+    """
+    Finds names in user input from capitalization, digits and keywords, without part of speech tagging
+    """
+
+    def __init__(self, vocabulary, stop):
+        """
+        :param vocabulary: set of lowercase common words, not names unless capitalized
+        :param stop: set of lowercase stopwords, never part of a name
+        """
+        self.vocabulary = frozenset(vocabulary)
+        self.stop = frozenset(stop)
+
+    def is_common(self, word):
+        """
+        :param word: lowercase word
+        :return: True if all parts of word are common words or stopwords, e.g. "what's"
+        """
+        parts = word_regex.findall(word)
+        return all(part in self.vocabulary or part in self.stop for part in parts)
+
+    def find(self, text):
+        """
+        :param text: user input
+        :return: list of names in text, punctuation around them removed
+        """
+        names = []
+        span = []
+        starts_sentence = True
+        after_trigger = False
+        # lowercase words only continue names that follow a trigger, e.g. "organisation Waldur testbed"
+        span_after_trigger = False
+
+        for token in text.split():
+            word = token.strip(punctuation)
+            lower = word.lower()
+
+            if not word or lower in self.stop:
+                is_name = False
+            elif lower in boundaries:
+                # capitalized keywords can be part of names, e.g. "project Cloud Pipeline"
+                is_name = word[0].isupper() and (after_trigger or bool(span))
+            elif any(c.isdigit() for c in word):
+                is_name = True
+            elif word[0].isupper():
+                # first words of sentences are capitalized anyway, acronyms are not
+                is_name = not starts_sentence or (len(word) > 1 and word.isupper())
+            else:
+                is_name = (after_trigger or span_after_trigger) and not self.is_common(lower)
+
+            if is_name:
+                if not span:
+                    span_after_trigger = after_trigger
+                span.append(word)
+            elif span:
+                names.append(" ".join(span))
+                span = []
+
+            # a name ends at punctuation after it
+            if span and token.rstrip(punctuation) != token:
+                names.append(" ".join(span))
+                span = []
+
+            if not span:
+                span_after_trigger = False
+            after_trigger = lower in triggers or (after_trigger and not is_name and lower in self.stop)
+            starts_sentence = token[-1] in sentence_end
+
+        if span:
+            names.append(" ".join(span))
+        return names
+
+
+_extractor = None
+_extractor_lock = Lock()
+
+
+def get_rule_extractor():
+    """
+    :return: the RuleExtractor of this process, built from the training corpus on first use
+    """
+    global _extractor
+    with _extractor_lock:
+        if _extractor is None:
+            _extractor = RuleExtractor(vocabulary(), stopwords())
+            log.info(f"Rule based name extractor built with {len(_extractor.vocabulary)} common words")
+        return _extractor
@@ -0,0 +1,220 @@
+import difflib
+from collections import defaultdict
+from logging import getLogger
+
+import numpy as np
+
+from common.cache import LRUCache
+from .lsh import shingles
+from .vectors import ngrams
+
+log = getLogger(__name__)
+
+# Names less similar than this to the extracted name are never considered a match
+SIMILARITY_FLOOR = 0.5
+
+
+class NameIndex(object):
+    """
+    Character trigram index of the names returned by the API, e.g. all VMs of a customer.
+    Only the names sharing the most trigrams with an extracted name are scored with difflib,
+    so resolving a name does not compare it to every name in the list.
+    """
+
+    def __init__(self, names, max_candidates=64):
+        """
+        :param names: list of names from API
+        :param max_candidates: how many names sharing the most trigrams to score
+        """
+        self.names = list(names)
+        self.max_candidates = max_candidates
+        self.trigrams = []                  # [number of trigrams of name, ...]
+        self.postings = defaultdict(list)   # {trigram: [id, ...], ...}
+
+        for i, name in enumerate(self.names):
+            grams = shingles(name.lower())
+            self.trigrams.append(len(grams))
+            for gram in grams:
+                self.postings[gram].append(i)
+
+    def candidates(self, extraction):
+        """
+        :param extraction: name extracted from user input
+        :return: ids of at most max_candidates names with the highest trigram dice coefficient, in list order
+        """
+        grams = shingles(extraction.lower())
+        shared = defaultdict(int)
+        for gram in grams:
+            for i in self.postings.get(gram, ()):
+                shared[i] += 1
+
+        if len(shared) <= self.max_candidates:
+            return sorted(shared)
+
+        def dice(i):
+            return 2 * shared[i] / (len(grams) + self.trigrams[i])
+
+        return sorted(sorted(shared, key=lambda i: (-dice(i), i))[:self.max_candidates])
+
+    def search(self, extraction, k=1):
+        """
+        :param extraction: name extracted from user input
+        :param k: max number of names to return
+        :return: [(name, similarity), ...] of at most k names more similar than SIMILARITY_FLOOR, most similar first
+        """
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq1(extraction.lower())
+
+        scored = []
+        for i in self.candidates(extraction):
+            matcher.set_seq2(self.names[i].lower())
+            similarity = matcher.ratio()
+            if similarity > SIMILARITY_FLOOR:
+                scored.append((i, similarity))
+
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return [(self.names[i], similarity) for i, similarity in scored[:k]]
+
+    def most_similar(self, extracted_names, k=1):
+        """
+        :param extracted_names: names extracted from user input
+        :param k: max number of names to return
+        :return: [(name, similarity), ...] of the k names most similar to any extracted name, most similar first.
+                 Of equally similar names, the one matched by an earlier extraction and earlier in the list comes first.
+        """
+        best = {}
+        for extraction in extracted_names:
+            for name, similarity in self.search(extraction, k):
+                if similarity > best.get(name, 0):
+                    best[name] = similarity
+        return sorted(best.items(), key=lambda item: -item[1])[:k]
+
+    def __len__(self):
+        return len(self.names)
+
+
+# Indexes of recently seen name lists, lists of the same customer's names repeat between requests
+# {tuple of names: NameIndex, ...}
+name_indexes = LRUCache(64)
+
+
+def get_name_index(names):
+    """
+    :param names: list of names from API
+    :return: NameIndex of names, built once for every distinct list
+    """
+    key = tuple(names)
+    index = name_indexes.get(key)
+    if index is None:
+        index = NameIndex(key)
+        name_indexes.put(key, index)
+    return index
+
+
+class VectorNameMatcher(object):
+    """
+    Scores extracted names against all names at once with numpy, alternative to NameIndex.
+    Names are character trigram count vectors, similarity is their cosine similarity.
+    Only the trigrams of the extracted names become columns of the matrix, so it stays small for long name lists.
+    """
+
+    def __init__(self, names, n=3):
+        """
+        :param names: list of names from API
+        :param n: length of character n-grams
+        """
+        self.names = list(names)
+        self.n = n
+
+        postings = defaultdict(lambda: ([], []))
+        norms = np.zeros(len(self.names), dtype=np.float32)
+        for i, name in enumerate(self.names):
+            counts = ngrams(name.lower(), n)
+            norms[i] = np.sqrt(sum(count * count for count in counts.values()))
+            for gram, count in counts.items():
+                ids, values = postings[gram]
+                ids.append(i)
+                values.append(count)
+
+        self.norms = norms
+        # {n-gram: (ids of names, counts of n-gram in them), ...}
+        self.postings = {
+            gram: (np.array(ids, dtype=np.intp), np.array(values, dtype=np.float32))
+            for gram, (ids, values) in postings.items()
+        }
+
+    def scores(self, extracted_names):
+        """
+        :param extracted_names: names extracted from user input
+        :return: names x extracted names matrix of cosine similarities
+        """
+        counts = [ngrams(extraction.lower(), self.n) for extraction in extracted_names]
+        columns = {}
+        for grams in counts:
+            for gram in grams:
+                if gram in self.postings:
+                    columns.setdefault(gram, len(columns))
+
+        names = np.zeros((len(self.names), len(columns)), dtype=np.float32)
+        for gram, column in columns.items():
+            ids, values = self.postings[gram]
+            names[ids, column] = values
+
+        queries = np.zeros((len(columns), len(counts)), dtype=np.float32)
+        query_norms = np.ones(len(counts), dtype=np.float32)
+        for row, grams in enumerate(counts):
+            query_norms[row] = np.sqrt(sum(count * count for count in grams.values())) or 1
+            for gram, count in grams.items():
+                column = columns.get(gram)
+                if column is not None:
+                    queries[column, row] = count
+
+        norms = np.where(self.norms == 0, 1, self.norms)
+        return (names @ queries) / norms[:, None] / query_norms[None, :]
+
+    def match_batch(self, extracted_names):
+        """
+        :param extracted_names: names extracted from user input
+        :return: [(name, similarity) or None if no name is more similar than SIMILARITY_FLOOR, ...] per extraction
+        """
+        if not self.names or not extracted_names:
+            return [None for _ in extracted_names]
+
+        scores = self.scores(extracted_names)
+        best = scores.argmax(axis=0)
+        return [
+            (self.names[row], float(scores[row, column])) if scores[row, column] > SIMILARITY_FLOOR else None
+            for column, row in enumerate(best)
+        ]
+
+    def most_similar(self, extracted_names, k=1):
+        """
+        Same as NameIndex.most_similar
+        """
+        if not self.names or not extracted_names:
+            return []
+
+        scores = self.scores(extracted_names).max(axis=1)
+        # stable sort keeps names in list order among equal scores
+        order = np.argsort(-scores, kind='stable')[:k]
+        return [(self.names[i], float(scores[i])) for i in order if scores[i] > SIMILARITY_FLOOR]
+
+    def __len__(self):
+        return len(self.names)
+
+
+# {tuple of names: VectorNameMatcher, ...}
+vector_matchers = LRUCache(64)
+
+
+def get_vector_matcher(names):
+    """
+    :param names: list of names from API
+    :return: VectorNameMatcher of names, built once for every distinct list
+    """
+    key = tuple(names)
+    matcher = vector_matchers.get(key)
+    if matcher is None:
+        matcher = VectorNameMatcher(key)
+        vector_matchers.put(key, matcher)
+    return matcher
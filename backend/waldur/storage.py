@@ -0,0 +1,249 @@
+import random
+import re
+from collections import OrderedDict, defaultdict
+from itertools import count
+from logging import getLogger
+from sys import intern
+from threading import Lock, RLock
+from time import perf_counter
+
+from chatterbot.conversation import Statement, Response
+from chatterbot.storage import StorageAdapter, SQLStorageAdapter
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+log = getLogger(__name__)
+
+# Indexes for the lookups SQLStorageAdapter makes, statement.text is already indexed by its unique constraint
+indexes = [
+    "CREATE INDEX IF NOT EXISTS ix_response_text ON response (text)",
+    "CREATE INDEX IF NOT EXISTS ix_response_statement_text ON response (statement_text, text)",
+    "CREATE INDEX IF NOT EXISTS ix_conversation_association ON conversation_association (conversation_id)",
+    "CREATE INDEX IF NOT EXISTS ix_tag_association ON tag_association (statement_id)",
+]
+
+# Statements that need the write lock of the database
+write_regex = re.compile(r"\s*(INSERT|UPDATE|DELETE|REPLACE)\b", re.IGNORECASE)
+
+
+class TunedSQLStorageAdapter(SQLStorageAdapter):
+    """
+    SQLStorageAdapter for sqlite databases that lets reads and writes from different threads proceed concurrently.
+    Threads share a pool of open connections and the database is in WAL mode.
+    Writes start their transaction with BEGIN IMMEDIATE, so they wait for each other with busy_timeout
+    instead of failing with 'database is locked' when a read transaction is upgraded to a write.
+
+    Takes the same kwargs as SQLStorageAdapter and:
+    :keyword pool_size: how many connections are kept open, defaults to 16
+    :keyword max_overflow: how many more connections can be opened when all of them are in use, defaults to 16
+    :keyword busy_timeout: milliseconds a write waits for other writes to finish, defaults to 5000
+    """
+
+    def __init__(self, **kwargs):
+        super(TunedSQLStorageAdapter, self).__init__(**kwargs)
+
+        self.busy_timeout = self.kwargs.get('busy_timeout', 5000)
+        self.stats_lock = Lock()
+        self.queries = 0
+        self.query_time = 0.0
+
+        self.engine.dispose()
+        self.engine = create_engine(
+            self.database_uri,
+            convert_unicode=True,
+            poolclass=QueuePool,
+            pool_size=self.kwargs.get('pool_size', 16),
+            max_overflow=self.kwargs.get('max_overflow', 16),
+            connect_args={'check_same_thread': False}
+        )
+        event.listen(self.engine, 'connect', self._configure_connection)
+        event.listen(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(self.engine, 'after_cursor_execute', self._after_cursor_execute)
+
+        self.Session = sessionmaker(bind=self.engine, expire_on_commit=True)
+
+        with self.engine.begin() as connection:
+            for index in indexes:
+                connection.execute(index)
+
+    def _configure_connection(self, dbapi_connection, connection_record):
+        # transactions are begun in _before_cursor_execute instead of by pysqlite
+        dbapi_connection.isolation_level = None
+        dbapi_connection.execute('PRAGMA journal_mode=WAL')
+        dbapi_connection.execute('PRAGMA synchronous=NORMAL')
+        dbapi_connection.execute(f'PRAGMA busy_timeout={int(self.busy_timeout)}')
+        dbapi_connection.execute('PRAGMA temp_store=MEMORY')
+
+    def _before_cursor_execute(self, connection, cursor, statement, parameters, context, executemany):
+        if write_regex.match(statement) and not connection.connection.connection.in_transaction:
+            cursor.execute('BEGIN IMMEDIATE')
+        connection.info.setdefault('query_start', []).append(perf_counter())
+
+    def _after_cursor_execute(self, connection, cursor, statement, parameters, context, executemany):
+        elapsed = perf_counter() - connection.info['query_start'].pop()
+        with self.stats_lock:
+            self.queries += 1
+            self.query_time += elapsed
+
+    def stats(self):
+        """
+        :return: dict with number of queries executed and total time spent executing them in seconds
+        """
+        with self.stats_lock:
+            return {
+                'queries': self.queries,
+                'query_time': self.query_time
+            }
+
+
+class MemoryStorageAdapter(StorageAdapter):
+    """
+    Storage adapter that keeps the statement graph in memory only, for stateless read-only replicas.
+    Meant to be filled from a snapshot with training.load_snapshot, nothing is persisted.
+    Statement texts are interned, so a text shared by a statement and the responses to it is stored once.
+    """
+
+    def __init__(self, **kwargs):
+        super(MemoryStorageAdapter, self).__init__(**kwargs)
+        self.adapter_supports_queries = False
+        self.lock = RLock()
+        self.drop()
+
+    def drop(self):
+        with self.lock:
+            self.statements = OrderedDict()     # {text: {prompt: occurrence, ...}, ...}
+            self.order = {}                     # {text: position the statement was added in, ...}
+            self.positions = count()
+            self.responses = defaultdict(list)  # {prompt: [text, ...], ...}
+            self.conversations = {}             # {conversation id: [text, ...], ...}
+            self.trained_sources = {}           # {source name: fingerprint, ...}
+            self.trained_conversations = set()  # {fingerprint, ...}
+
+    def _statement(self, text):
+        statement = Statement(text)
+        for prompt, occurrence in self.statements[text].items():
+            statement.add_response(Response(prompt, occurrence=occurrence))
+        return statement
+
+    def _add(self, text, prompt=None, occurrence=1, increment=True):
+        """
+        :return: True if text was a new statement
+        """
+        new = text not in self.statements
+        if new:
+            text = intern(text)
+            self.statements[text] = {}
+            self.order[text] = next(self.positions)
+
+        if prompt is not None:
+            prompts = self.statements[text]
+            if prompt not in prompts:
+                prompts[intern(prompt)] = occurrence
+                self.responses[prompt].append(text)
+            elif increment:
+                prompts[prompt] += occurrence
+
+        return new
+
+    def count(self):
+        return len(self.statements)
+
+    def find(self, statement_text):
+        with self.lock:
+            if statement_text in self.statements:
+                return self._statement(statement_text)
+            return None
+
+    def remove(self, statement_text):
+        with self.lock:
+            self.order.pop(statement_text, None)
+            for prompt in self.statements.pop(statement_text, {}):
+                self.responses[prompt].remove(statement_text)
+            for text in self.responses.pop(statement_text, []):
+                del self.statements[text][statement_text]
+
+    def filter(self, **kwargs):
+        """
+        Supports filtering by in_response_to__contains=<text> and in_response_to=[], same as SQLStorageAdapter
+        """
+        with self.lock:
+            if not kwargs:
+                texts = list(self.statements)
+            elif 'in_response_to__contains' in kwargs:
+                texts = list(self.responses.get(kwargs['in_response_to__contains'], []))
+            elif kwargs.get('in_response_to') == []:
+                texts = [text for text, prompts in self.statements.items() if not prompts]
+            else:
+                raise self.AdapterMethodNotImplementedError(f"Filtering by {list(kwargs)} is not supported")
+
+            return [self._statement(text) for text in texts]
+
+    def update(self, statement):
+        if statement:
+            with self.lock:
+                self._add(statement.text)
+                for response in statement.in_response_to:
+                    self._add(statement.text, response.text, response.occurrence)
+
+    def create_conversation(self):
+        with self.lock:
+            conversation_id = len(self.conversations) + 1
+            self.conversations[conversation_id] = []
+            return conversation_id
+
+    def add_to_conversation(self, conversation_id, statement, response):
+        with self.lock:
+            self.update(statement)
+            self.update(response)
+            self.conversations[conversation_id].extend([statement.text, response.text])
+
+    def get_latest_response(self, conversation_id):
+        """
+        Same as SQLStorageAdapter, second to last of the conversation's statements in the order they were added
+        """
+        with self.lock:
+            texts = {text for text in self.conversations.get(conversation_id, []) if text in self.order}
+            texts = sorted(texts, key=self.order.get)
+            if len(texts) >= 2:
+                return self._statement(texts[-2])
+            if len(texts) == 1:
+                return self._statement(texts[0])
+            return None
+
+    def get_random(self):
+        with self.lock:
+            if not self.statements:
+                raise self.EmptyDatabaseException()
+            return self._statement(random.choice(list(self.statements)))
+
+    def get_response_statements(self):
+        with self.lock:
+            return [self._statement(text) for text in self.statements if self.responses.get(text)]
+
+    # Bulk operations for training.py
+
+    def dump_statements(self):
+        """
+        :return: same as training.dump_statements
+        """
+        with self.lock:
+            return OrderedDict((text, list(prompts.items())) for text, prompts in self.statements.items())
+
+    def add_statements(self, texts, pairs, increment):
+        """
+        :param texts: iterable of statement texts
+        :param pairs: {(statement text, prompt text): occurrence, ...}
+        :param increment: whether to add occurrence of known responses to the known occurrence
+        :return: number of statements added
+        """
+        with self.lock:
+            added = sum(self._add(text) for text in texts)
+            for (text, prompt), occurrence in pairs.items():
+                added += self._add(text, prompt, occurrence, increment)
+            return added
+
+    def mark_trained(self, source, source_fingerprint, conversation_fingerprints):
+        with self.lock:
+            self.trained_sources[source] = source_fingerprint
+            self.trained_conversations.update(conversation_fingerprints)
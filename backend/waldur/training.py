@@ -0,0 +1,291 @@
+import hashlib
+import json
+import pickle
+from collections import OrderedDict, Counter
+from logging import getLogger
+from os import path, replace
+
+from chatterbot import conversation
+from chatterbot.corpus import Corpus
+from chatterbot.ext.sqlalchemy_app.models import Statement, Response
+from sqlalchemy import select, and_, bindparam, MetaData, Table, Column, String
+
+from .corpus.list_training_data import waldur_list_corpus
+from .storage import MemoryStorageAdapter
+
+log = getLogger(__name__)
+
+# Increase when the contents of the snapshot change
+SNAPSHOT_VERSION = 2
+DEFAULT_SNAPSHOT_PATH = './chatterbot.snapshot'
+
+chatterbot_corpus = "chatterbot.corpus.english.greetings"
+waldur_corpus = path.join(path.dirname(path.abspath(__file__)), 'corpus')
+
+# Fingerprints of what the database has been trained on, kept in the same database as the statements
+metadata = MetaData()
+trained_sources = Table(
+    'trained_source', metadata,
+    Column('name', String(64), primary_key=True),
+    Column('fingerprint', String(64))
+)
+trained_conversations = Table(
+    'trained_conversation', metadata,
+    Column('fingerprint', String(64), primary_key=True),
+    Column('source', String(64))
+)
+
+
+def corpus_sources():
+    """
+    All conversations the bot is trained on
+    :return: OrderedDict of {source name: [conversation, ...]}, conversation is a list of statement texts
+    """
+    corpus = Corpus()
+    return OrderedDict([
+        ('chatterbot', [c for data in corpus.load_corpus(chatterbot_corpus) for c in data]),
+        ('waldur', [c for data in corpus.load_corpus(waldur_corpus) for c in data]),
+        ('list', waldur_list_corpus),
+    ])
+
+
+def fingerprint(conversations):
+    """
+    :param conversations: anything json serializable, e.g. output of corpus_sources
+    :return: sha256 hex digest of conversations
+    """
+    return hashlib.sha256(json.dumps(conversations, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def trained_fingerprints(storage):
+    """
+    :param storage: chatterbot SQLStorageAdapter or MemoryStorageAdapter
+    :return: ({source name: fingerprint, ...}, {conversation fingerprint, ...}) of everything storage is trained on
+    """
+    if isinstance(storage, MemoryStorageAdapter):
+        return dict(storage.trained_sources), set(storage.trained_conversations)
+
+    metadata.create_all(storage.engine)
+    with storage.engine.connect() as connection:
+        sources = {name: f for name, f in connection.execute(
+            select([trained_sources.c.name, trained_sources.c.fingerprint]))}
+        conversations = {f for f, in connection.execute(select([trained_conversations.c.fingerprint]))}
+    return sources, conversations
+
+
+def mark_trained(storage, source, conversations):
+    """
+    Saves fingerprints of source and its conversations to storage
+    :param storage: chatterbot SQLStorageAdapter or MemoryStorageAdapter
+    :param source: source name, key of corpus_sources
+    :param conversations: all conversations of source
+    """
+    if isinstance(storage, MemoryStorageAdapter):
+        storage.mark_trained(source, fingerprint(conversations), {fingerprint(c) for c in conversations})
+        return
+
+    metadata.create_all(storage.engine)
+    _, known = trained_fingerprints(storage)
+    new = {fingerprint(conversation) for conversation in conversations} - known
+
+    with storage.engine.begin() as connection:
+        connection.execute(trained_sources.delete().where(trained_sources.c.name == source))
+        connection.execute(trained_sources.insert(), name=source, fingerprint=fingerprint(conversations))
+        if new:
+            connection.execute(trained_conversations.insert(), [{'fingerprint': f, 'source': source} for f in new])
+
+
+def dump_statements(storage):
+    """
+    Reads the statement graph straight from the tables of SQLStorageAdapter
+    :param storage: chatterbot SQLStorageAdapter or MemoryStorageAdapter
+    :return: {statement text: [(prompt text, occurrence), ...], ...}
+    """
+    if isinstance(storage, MemoryStorageAdapter):
+        return storage.dump_statements()
+
+    statements = OrderedDict()
+    with storage.engine.connect() as connection:
+        for text, in connection.execute(select([Statement.__table__.c.text]).order_by(Statement.__table__.c.id)):
+            statements[text] = []
+
+        responses = Response.__table__
+        for text, prompt, occurrence in connection.execute(
+                select([responses.c.statement_text, responses.c.text, responses.c.occurrence])
+                .order_by(responses.c.id)):
+            statements.setdefault(text, []).append((prompt, occurrence))
+
+    return statements
+
+
+def response_pairs(statements):
+    """
+    :param statements: output of dump_statements
+    :return: set of (statement text, prompt text)
+    """
+    return {(text, prompt) for text, responses in statements.items() for prompt, _ in responses}
+
+
+def _insert_missing(connection, texts, pairs):
+    """
+    Inserts statements and responses that are not in the database yet with one prepared statement per table
+    :param connection: sqlalchemy connection, in a transaction
+    :param texts: iterable of statement texts
+    :param pairs: {(statement text, prompt text): occurrence, ...}
+    :return: (number of statements inserted, {(statement text, prompt text): occurrence} that were already there)
+    """
+    statements = Statement.__table__
+    responses = Response.__table__
+
+    existing = {text for text, in connection.execute(select([statements.c.text]))}
+    existing_pairs = {
+        (text, prompt) for text, prompt in connection.execute(select([responses.c.statement_text, responses.c.text]))
+    }
+
+    new_statements = [{'text': text, 'extra_data': {}} for text in OrderedDict.fromkeys(texts) if text not in existing]
+    new_responses = [
+        {'statement_text': text, 'text': prompt, 'occurrence': occurrence}
+        for (text, prompt), occurrence in pairs.items() if (text, prompt) not in existing_pairs
+    ]
+
+    if new_statements:
+        connection.execute(statements.insert(), new_statements)
+    if new_responses:
+        connection.execute(responses.insert(), new_responses)
+
+    return len(new_statements), {pair: occurrence for pair, occurrence in pairs.items() if pair in existing_pairs}
+
+
+def merge_statements(storage, statements):
+    """
+    Adds all statements and responses missing from storage in a single transaction
+    :param storage: chatterbot SQLStorageAdapter or MemoryStorageAdapter
+    :param statements: output of dump_statements
+    :return: number of statements added
+    """
+    pairs = OrderedDict(
+        ((text, prompt), occurrence) for text, responses in statements.items() for prompt, occurrence in responses
+    )
+
+    if isinstance(storage, MemoryStorageAdapter):
+        return storage.add_statements(statements, pairs, increment=False)
+
+    with storage.engine.begin() as connection:
+        added, _ = _insert_missing(connection, statements, pairs)
+
+    return added
+
+
+def ingest(chatbot, conversations):
+    """
+    Trains chatbot on conversations the same way chatterbot's ListTrainer does,
+    but with all database writes in a single transaction
+    :param chatbot: chatterbot ChatBot with SQLStorageAdapter or MemoryStorageAdapter
+    :param conversations: list of conversations, conversation is a list of statement texts
+    :return: number of statements added
+    """
+    texts = []
+    pairs = Counter()
+    for texts_of_conversation in conversations:
+        previous = None
+        for text in texts_of_conversation:
+            statement = conversation.Statement(text)
+            for preprocessor in chatbot.preprocessors:
+                statement = preprocessor(chatbot, statement)
+
+            texts.append(statement.text)
+            if previous is not None:
+                pairs[(statement.text, previous)] += 1
+            previous = statement.text
+
+    if isinstance(chatbot.storage, MemoryStorageAdapter):
+        return chatbot.storage.add_statements(texts, pairs, increment=True)
+
+    responses = Response.__table__
+    increment = responses.update()\
+        .where(and_(responses.c.statement_text == bindparam('_text'), responses.c.text == bindparam('_prompt')))\
+        .values(occurrence=responses.c.occurrence + bindparam('_occurrence'))
+
+    with chatbot.storage.engine.begin() as connection:
+        added, existing = _insert_missing(connection, texts, pairs)
+        if existing:
+            connection.execute(increment, [
+                {'_text': text, '_prompt': prompt, '_occurrence': occurrence}
+                for (text, prompt), occurrence in existing.items()
+            ])
+
+    return added
+
+
+def write_snapshot(chatbot, snapshot_path):
+    """
+    Saves the trained statements and IntentIndex of chatbot
+    :param chatbot: trained WaldurBot
+    :param snapshot_path: file to write the snapshot to, replaced atomically
+    """
+    if not chatbot.intent_index.loaded:
+        chatbot.intent_index.load(chatbot.storage)
+
+    snapshot = {
+        'version': SNAPSHOT_VERSION,
+        'fingerprint': fingerprint(corpus_sources()),
+        'statements': dump_statements(chatbot.storage),
+        'intent_index': chatbot.intent_index,
+    }
+
+    temporary_path = snapshot_path + '.tmp'
+    with open(temporary_path, 'wb') as file:
+        pickle.dump(snapshot, file, protocol=pickle.HIGHEST_PROTOCOL)
+    replace(temporary_path, snapshot_path)
+
+    log.info(f"Snapshot of {len(snapshot['statements'])} statements written to {snapshot_path}")
+
+
+def read_snapshot(snapshot_path):
+    """
+    :param snapshot_path: file written by write_snapshot
+    :return: snapshot dict, None if there is no snapshot or it is out of date
+    """
+    if not path.isfile(snapshot_path):
+        log.info(f"No snapshot at {snapshot_path}")
+        return None
+
+    with open(snapshot_path, 'rb') as file:
+        snapshot = pickle.load(file)
+
+    if snapshot.get('version') != SNAPSHOT_VERSION:
+        log.info(f"Snapshot version {snapshot.get('version')} is not {SNAPSHOT_VERSION}")
+        return None
+
+    if snapshot['fingerprint'] != fingerprint(corpus_sources()):
+        log.info("Corpus has changed since the snapshot was written")
+        return None
+
+    return snapshot
+
+
+def load_snapshot(chatbot, snapshot_path):
+    """
+    Restores trained state from a snapshot instead of training chatbot.
+    Statements missing from chatbot's database are added to it.
+    :param chatbot: WaldurBot
+    :param snapshot_path: file written by write_snapshot
+    :return: True if snapshot was loaded, False if chatbot needs to be trained
+    """
+    snapshot = read_snapshot(snapshot_path)
+    if snapshot is None:
+        return False
+
+    added = merge_statements(chatbot.storage, snapshot['statements'])
+    log.info(f"Added {added} statements from snapshot {snapshot_path}")
+
+    for source, conversations in corpus_sources().items():
+        mark_trained(chatbot.storage, source, conversations)
+
+    if response_pairs(dump_statements(chatbot.storage)) == response_pairs(snapshot['statements']):
+        chatbot.intent_index.restore(snapshot['intent_index'])
+    else:
+        # database has statements the snapshot doesn't know about, e.g. from /teach/
+        chatbot.intent_index.load(chatbot.storage)
+
+    return True
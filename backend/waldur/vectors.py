@@ -0,0 +1,173 @@
+from collections import Counter
+from logging import getLogger
+from threading import RLock
+
+import numpy as np
+
+from .intents import Match, normalize
+
+log = getLogger(__name__)
+
+
+def ngrams(text, n=3):
+    """
+    :param text: normalized statement
+    :param n: length of n-grams
+    :return: Counter of character n-grams in text, padded with a space on both ends
+    """
+    text = " " + text + " "
+    return Counter(text[i:i + n] for i in range(len(text) - n + 1))
+
+
+class VectorScorer(object):
+    """
+    Scores queries against all statements of an IntentIndex with a single matrix product.
+    Statements are TF-IDF weighted character n-gram vectors, confidence is the cosine similarity.
+    Rows of statements added to the index are appended to the matrix, weighted with the IDF of the last build,
+    and the whole matrix is rebuilt with an up to date IDF only when the index has grown by rebuild_growth since.
+    """
+
+    def __init__(self, index, n=3, rebuild_growth=0.25):
+        """
+        :param index: IntentIndex whose statements and responses are used
+        :param n: length of character n-grams
+        :param rebuild_growth: share of statements that can be added to the index before the matrix is rebuilt
+        """
+        self.index = index
+        self.n = n
+        self.rebuild_growth = rebuild_growth
+        self.lock = RLock()
+        self.size = None            # statements in the matrix
+        self.built_size = 0         # statements in the matrix when it was last built
+        self.vocabulary = {}        # {n-gram: column, ...}
+        self.documents = None       # [number of statements with n-gram, ...] by column
+        self.idf = None             # [idf, ...] by column
+        self.buffer = None          # matrix with room for more statements and n-grams
+        self.matrix = None          # statements x n-grams view of buffer, rows of unit length
+
+    def build(self):
+        with self.lock, self.index.lock:
+            counts = [ngrams(text, self.n) for text in self.index.normalized]
+
+            self.vocabulary = {}
+            for grams in counts:
+                for gram in grams:
+                    self.vocabulary.setdefault(gram, len(self.vocabulary))
+
+            matrix = np.zeros((len(counts), len(self.vocabulary)), dtype=np.float32)
+            for row, grams in enumerate(counts):
+                for gram, count in grams.items():
+                    matrix[row, self.vocabulary[gram]] = count
+
+            self.documents = np.count_nonzero(matrix, axis=0)
+            self.idf = self._idf(len(counts), self.documents)
+            self.buffer = self._unit_rows(matrix * self.idf)
+            self.matrix = self.buffer
+            self.size = self.built_size = len(counts)
+
+        log.info(f"Vector scorer built with {self.matrix.shape[0]} statements and {self.matrix.shape[1]} n-grams")
+
+    def extend(self):
+        """
+        Appends rows for the statements added to the index since the matrix was built or extended.
+        N-grams seen for the first time get columns with IDF of the current number of statements,
+        IDF of known n-grams is not changed.
+        """
+        with self.lock, self.index.lock:
+            counts = [ngrams(text, self.n) for text in self.index.normalized[self.size:]]
+            for grams in counts:
+                for gram in grams:
+                    self.vocabulary.setdefault(gram, len(self.vocabulary))
+
+            rows = self.size + len(counts)
+            columns = len(self.vocabulary)
+            self._reserve(rows, columns)
+
+            added = self.buffer[self.size:rows, :columns]
+            for row, grams in enumerate(counts):
+                for gram, count in grams.items():
+                    added[row, self.vocabulary[gram]] = count
+
+            known = len(self.idf)
+            self.documents = np.concatenate([self.documents, np.zeros(columns - known, dtype=self.documents.dtype)])
+            self.documents += np.count_nonzero(added, axis=0)
+            self.idf = np.concatenate([self.idf, self._idf(rows, self.documents[known:])])
+
+            added[:] = self._unit_rows(added * self.idf)
+            self.matrix = self.buffer[:rows, :columns]
+            self.size = rows
+
+        log.debug(f"Vector scorer extended to {rows} statements and {columns} n-grams")
+
+    def _reserve(self, rows, columns):
+        """
+        Makes room for rows x columns in buffer, at least doubling the dimensions that are too small
+        """
+        capacity_rows, capacity_columns = self.buffer.shape
+        if rows <= capacity_rows and columns <= capacity_columns:
+            return
+
+        buffer = np.zeros((
+            capacity_rows if rows <= capacity_rows else max(rows, 2 * capacity_rows),
+            capacity_columns if columns <= capacity_columns else max(columns, 2 * capacity_columns)
+        ), dtype=np.float32)
+        buffer[:capacity_rows, :capacity_columns] = self.buffer
+        self.buffer = buffer
+
+    @staticmethod
+    def _idf(statements, documents):
+        return (np.log((1 + statements) / (1 + documents)) + 1).astype(np.float32)
+
+    def vectorize(self, texts):
+        """
+        :param texts: list of queries
+        :return: queries x n-grams matrix, n-grams not seen in any statement are ignored
+        """
+        vectors = np.zeros((len(texts), len(self.vocabulary)), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for gram, count in ngrams(normalize(text), self.n).items():
+                column = self.vocabulary.get(gram)
+                if column is not None:
+                    vectors[row, column] = count
+        return self._unit_rows(vectors * self.idf)
+
+    def match_batch(self, texts):
+        """
+        Finds the closest known statement for every query at once
+        :param texts: list of queries
+        :return: list of Match or None if query shares no n-gram with any known statement
+        """
+        with self.lock:
+            size = len(self.index)
+            if self.matrix is None or size < self.size or size > self.built_size * (1 + self.rebuild_growth):
+                self.build()
+            elif size != self.size:
+                self.extend()
+
+            if self.matrix.shape[0] == 0:
+                return [None for _ in texts]
+
+            scores = self.matrix @ self.vectorize(texts).T
+            best = scores.argmax(axis=0)
+
+            matches = []
+            for column, row in enumerate(best):
+                confidence = round(float(scores[row, column]), 2)
+                if confidence <= 0:
+                    matches.append(None)
+                else:
+                    matches.append(Match(self.index.prompts[row], self.index.responses[row][0], confidence))
+            return matches
+
+    def match(self, text):
+        """
+        :param text: query
+        :return: Match or None, same as IntentIndex.match
+        """
+        return self.match_batch([text])[0]
+
+    @staticmethod
+    def _unit_rows(matrix):
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return matrix / norms
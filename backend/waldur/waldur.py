@@ -1,47 +1,133 @@
 from logging import getLogger
-from os import path
+from time import perf_counter
 
 from chatterbot import ChatBot
-from chatterbot.trainers import ListTrainer
 from flask import Flask, request, make_response, jsonify
 from flask_restful import Api
 
-from .corpus.list_training_data import waldur_list_corpus
+from common.cache import LRUCache
+from .intents import IntentIndex
 from .resources import Query, Teach, Authenticate
+from .training import corpus_sources, fingerprint, trained_fingerprints, mark_trained, ingest
 
 log = getLogger(__name__)
 
+CONFIDENCE_THRESHOLD = 0.55
+DEFAULT_RESPONSE = 'I am sorry, but I do not understand.'
+
+# Logic adapters the bot can be configured to match intents with
+matchers = {
+    # in-memory IntentIndex
+    'index': [
+        {
+            'import_path': 'backend.waldur.adapters.IntentIndexAdapter',
+            'threshold': CONFIDENCE_THRESHOLD,
+            'default_response': DEFAULT_RESPONSE
+        }
+    ],
+    # IntentIndex statements scored with numpy, see vectors.VectorScorer
+    'vector': [
+        {
+            'import_path': 'backend.waldur.adapters.VectorScorerAdapter',
+            'threshold': CONFIDENCE_THRESHOLD,
+            'default_response': DEFAULT_RESPONSE
+        }
+    ],
+    # chatterbot's own adapters, compare input to every statement in database
+    'bestmatch': [
+        'chatterbot.logic.BestMatch',
+        {
+            'import_path': 'chatterbot.logic.LowConfidenceAdapter',
+            'threshold': CONFIDENCE_THRESHOLD,
+            'default_response': DEFAULT_RESPONSE
+        }
+    ]
+}
+
+
+# Storage adapters the bot can be configured to keep statements in
+storages = {
+    'sql': 'chatterbot.storage.SQLStorageAdapter',
+    # sqlite with per-thread connections, WAL and indexes, see storage.TunedSQLStorageAdapter
+    'tuned': 'backend.waldur.storage.TunedSQLStorageAdapter',
+    # nothing on disk, for stateless replicas loading a snapshot, see storage.MemoryStorageAdapter
+    'memory': 'backend.waldur.storage.MemoryStorageAdapter',
+}
+
+
+class WaldurBot(ChatBot):
+    """
+    ChatBot that keeps its IntentIndex up to date with everything it learns.
+    Responses to queries are cached in response_cache, which is cleared when the bot is taught, see teach.
 
-def init_bot():
-    log.info("Creating bot")
-    return ChatBot(
+    Takes the same kwargs as ChatBot and:
+    :keyword response_cache_size: max number of cached responses, 0 disables the cache, defaults to 1024
+    """
+
+    def __init__(self, name, **kwargs):
+        self.intent_index = IntentIndex()
+        self.response_cache = LRUCache(kwargs.get('response_cache_size', 1024))
+        super(WaldurBot, self).__init__(name, **kwargs)
+
+    def learn_response(self, statement, previous_statement):
+        super(WaldurBot, self).learn_response(statement, previous_statement)
+        if previous_statement and self.intent_index.loaded:
+            self.intent_index.add(previous_statement.text, statement.text)
+
+    def teach(self, statement, previous_statement):
+        """
+        Learns statement as a response to previous_statement and drops cached responses, which may be outdated now.
+        Unlike learn_response, which get_response calls on every query, this is only called on explicit teaching.
+        :param statement: Statement
+        :param previous_statement: Statement
+        """
+        self.learn_response(statement, previous_statement)
+        self.response_cache.clear()
+
+
+def init_bot(matcher='index', storage='sql', database='./chatterbotdb.sqlite3', response_cache_size=1024):
+    """
+    :param matcher: key of matchers, which logic adapters to use
+    :param storage: key of storages, which storage adapter to use
+    :param database: path to sqlite database file, unused with memory storage
+    :param response_cache_size: max number of responses to queries to cache, 0 disables the cache
+    """
+    log.info(f"Creating bot with '{matcher}' matcher and '{storage}' storage")
+    return WaldurBot(
         'Waldur',
-        storage_adapter='chatterbot.storage.SQLStorageAdapter',
-        trainer='chatterbot.trainers.ChatterBotCorpusTrainer',
-        database='./chatterbotdb.sqlite3',
+        storage_adapter=storages[storage],
+        trainer='chatterbot.trainers.ListTrainer',
+        database=database,
         logger=log,
-        logic_adapters=[
-            'chatterbot.logic.BestMatch',
-            {
-                'import_path': 'chatterbot.logic.LowConfidenceAdapter',
-                'threshold': 0.55,
-                'default_response': 'I am sorry, but I do not understand.'
-            }
-        ]
+        logic_adapters=matchers[matcher],
+        response_cache_size=response_cache_size,
+        # replicas don't keep a history of conversations, /teach/ still adds statements
+        read_only=storage == 'memory'
     )
 
 
 def train_bot(chatbot):
-    log.info("Training bot on chatterbot corpus")
-    chatbot.train("chatterbot.corpus.english.greetings")
-
-    log.info("Training bot on waldur corpus")
-    waldur_corpus = path.join(path.dirname(path.abspath(__file__)), 'corpus')
-    chatbot.train(waldur_corpus)
-
-    chatbot.set_trainer(ListTrainer)
-    for conversation in waldur_list_corpus:
-        chatbot.train(conversation)
+    """
+    Trains chatbot on conversations from training.corpus_sources that its database hasn't been trained on yet
+    :param chatbot: WaldurBot
+    :return: chatbot
+    """
+    trained_sources, trained_conversations = trained_fingerprints(chatbot.storage)
+
+    for source, conversations in corpus_sources().items():
+        if trained_sources.get(source) == fingerprint(conversations):
+            log.info(f"Corpus '{source}' has not changed, skipped all {len(conversations)} conversations")
+            continue
+
+        start = perf_counter()
+        new = [c for c in conversations if fingerprint(c) not in trained_conversations]
+        added = ingest(chatbot, new)
+        mark_trained(chatbot.storage, source, conversations)
+        log.info(f"Trained bot on {len(new)} new or changed conversations of corpus '{source}' "
+                 f"with {added} new statements in {perf_counter() - start:.3f}s, "
+                 f"skipped {len(conversations) - len(new)}")
+
+    chatbot.intent_index.load(chatbot.storage)
 
     return chatbot
 
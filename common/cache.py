@@ -0,0 +1,86 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+
+class LRUCache(object):
+    """
+    Thread-safe dict of at most maxsize items that evicts the least recently used item when full.
+
+    Every clear increases version, so a value computed before a clear can be dropped instead of cached:
+        version = cache.version
+        value = compute(key)
+        cache.put(key, value, version=version)
+
+    Items put with a ttl expire after ttl seconds, an expired item is a miss.
+    """
+
+    def __init__(self, maxsize=1024):
+        """
+        :param maxsize: max number of items, 0 disables caching
+        """
+        self.maxsize = maxsize
+        self.lock = Lock()
+        self.items = OrderedDict()
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """
+        :param key: key of item
+        :param default: returned if key is not cached
+        :return: cached value or default
+        """
+        with self.lock:
+            item = self.items.get(key)
+            if item is not None:
+                value, expires = item
+                if expires is None or expires > monotonic():
+                    self.items.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self.items[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value, version=None, ttl=None):
+        """
+        :param key: key of item
+        :param value: value of item
+        :param version: value of self.version when value was computed, value is not cached if cache was cleared since
+        :param ttl: seconds the item is cached for, until evicted if None
+        """
+        with self.lock:
+            if self.maxsize <= 0 or (version is not None and version != self.version):
+                return
+            self.items[key] = (value, None if ttl is None else monotonic() + ttl)
+            self.items.move_to_end(key)
+            while len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+            self.version += 1
+
+    def stats(self):
+        """
+        :return: dict with number of hits, misses, cached items and hit rate
+        """
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self.items),
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, key):
+        with self.lock:
+            item = self.items.get(key)
+            return item is not None and (item[1] is None or item[1] > monotonic())
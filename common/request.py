@@ -1,5 +1,12 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import DefaultCookiePolicy
 from logging import getLogger
+from threading import Lock
+from urllib.parse import urlsplit, parse_qs
 from requests import Session, Request
+from requests.adapters import HTTPAdapter
+from .cache import LRUCache
 from .utils import obscure
 import json
 
@@ -152,6 +159,246 @@ class BackendConnection(object):
             raise Exception(response[0]['message'])
 
 
+class SessionPool(object):
+    """
+    Keep-alive sessions shared by all WaldurConnections, one per API url.
+    Connections to the API stay open between requests, so only the first request to a host pays for TCP and TLS setup.
+    Sessions don't keep cookies, as they are shared by the connections of all users.
+    """
+
+    def __init__(self, pool_size=10, block=False):
+        """
+        :param pool_size: max number of open connections per host, e.g. threads querying the API at once
+        :param block: if True, wait for a free connection when pool_size connections are in use,
+                      otherwise open a connection that is closed after the request
+        """
+        self.pool_size = pool_size
+        self.block = block
+        self.lock = Lock()
+        self.sessions = {}      # {api url: Session, ...}
+
+    def configure(self, pool_size=None, block=None):
+        """
+        Changes limits of sessions created from now on, closes existing sessions
+        """
+        with self.lock:
+            if pool_size is not None:
+                self.pool_size = pool_size
+            if block is not None:
+                self.block = block
+        self.clear()
+
+    def get(self, api_url):
+        """
+        :param api_url: base url of the API
+        :return: Session for api_url, created on first use
+        """
+        with self.lock:
+            session = self.sessions.get(api_url)
+            if session is None:
+                session = Session()
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, pool_block=self.block)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self.sessions[api_url] = session
+                log.debug(f"Created session for {api_url} with {self.pool_size} connections per host")
+            return session
+
+    def stats(self):
+        """
+        :return: {api url: {'requests': sent, 'connections': opened, 'reused': requests sent on open connections}, ...}
+        """
+        with self.lock:
+            sessions = list(self.sessions.items())
+
+        stats = {}
+        for api_url, session in sessions:
+            requests = connections = 0
+            for adapter in set(session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    pool = pools.get(key)
+                    if pool is not None:
+                        requests += pool.num_requests
+                        connections += pool.num_connections
+            stats[api_url] = {'requests': requests, 'connections': connections, 'reused': requests - connections}
+        return stats
+
+    def clear(self):
+        """
+        Closes all sessions and their connections
+        """
+        with self.lock:
+            sessions = list(self.sessions.values())
+            self.sessions.clear()
+        for session in sessions:
+            session.close()
+
+
+# Sessions of all WaldurConnections in this process
+sessions = SessionPool()
+
+
+# Seconds responses of GET requests to these endpoints are cached for, other endpoints are not cached.
+# Responses with validators are revalidated after that, with 0 every request is revalidated
+# {endpoint: seconds, ...}
+DEFAULT_TTLS = {
+    'customers': 60,
+    'projects': 60,
+    'services': 300,
+    'openstack-tenants': 60,
+    'openstacktenant-instances': 30,
+    'openstacktenant-service-project-link': 300,
+    'openstacktenant-images': 600,
+    'openstacktenant-flavors': 600,
+    'openstacktenant-subnets': 300,
+    'openstacktenant-security-groups': 300,
+    'keys': 300,
+}
+
+
+# Response kept after it expires, to be revalidated with a conditional request
+# validators - {'If-None-Match': ETag, 'If-Modified-Since': Last-Modified} of the response, whichever were sent
+# body - parsed response
+# next_page - parameters of the next page, see next_page_parameters
+# size - length of the response body in bytes
+Validated = namedtuple('Validated', ['validators', 'body', 'next_page', 'size'])
+
+
+class ResponseCache(object):
+    """
+    Responses of Waldur API to GET requests of every token, so lookups repeated by consecutive requests are not sent.
+    Responses with an ETag or Last-Modified header are kept after they expire,
+    the next request for them is conditional and the kept response is used if the API answers 304 Not Modified.
+    A successful request with any other method invalidates all responses cached for its token.
+    Cached responses are shared, they must not be modified.
+    """
+
+    def __init__(self, maxsize=1024, ttls=None):
+        """
+        :param maxsize: max number of cached responses, 0 disables caching
+        :param ttls: {endpoint: seconds, ...}, defaults to DEFAULT_TTLS
+        """
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.cache = LRUCache(maxsize)
+        self.validated = LRUCache(maxsize)  # {key: Validated, ...}
+        self.lock = Lock()
+        self.generations = {}   # {token: number of invalidations, ...}
+        self.revalidated = 0    # number of 304 responses
+        self.bytes_saved = 0    # size of the bodies the API did not send because of 304 responses
+
+    def configure(self, maxsize=None, ttls=None):
+        """
+        Changes size and ttls, drops all cached responses
+        """
+        with self.lock:
+            if ttls is not None:
+                self.ttls = dict(ttls)
+            if maxsize is not None:
+                self.cache = LRUCache(maxsize)
+                self.validated = LRUCache(maxsize)
+            else:
+                self.cache.clear()
+                self.validated.clear()
+            self.revalidated = 0
+            self.bytes_saved = 0
+
+    def ttl(self, endpoint):
+        """
+        :return: seconds responses of endpoint are cached for, None if they are not cached
+        """
+        return self.ttls.get(endpoint.strip('/'))
+
+    def key(self, token, endpoint, parameters):
+        """
+        :return: key of the response to a request, different after every invalidation of token
+        """
+        with self.lock:
+            generation = self.generations.get(token, 0)
+        return token, generation, endpoint, json.dumps(parameters, sort_keys=True)
+
+    def get(self, key):
+        """
+        :return: cached response, None if not cached or expired
+        """
+        return self.cache.get(key)
+
+    def put(self, key, response, ttl):
+        self.cache.put(key, response, ttl=ttl)
+
+    def get_validated(self, key):
+        """
+        :return: Validated response to revalidate, None if the response had no validators
+        """
+        return self.validated.get(key)
+
+    def put_validated(self, key, body, next_page, headers, size):
+        """
+        Keeps a response with its validators, if it has any
+        :param headers: headers of the response
+        """
+        validators = {}
+        if headers.get('ETag'):
+            validators['If-None-Match'] = headers['ETag']
+        if headers.get('Last-Modified'):
+            validators['If-Modified-Since'] = headers['Last-Modified']
+        if validators:
+            self.validated.put(key, Validated(validators, body, next_page, size))
+
+    def not_modified(self, key, validated, ttl):
+        """
+        Caches a revalidated response again for ttl seconds
+        :param validated: Validated response the API answered 304 to
+        """
+        self.cache.put(key, (validated.body, validated.next_page), ttl=ttl)
+        with self.lock:
+            self.revalidated += 1
+            self.bytes_saved += validated.size
+
+    def invalidate(self, token):
+        """
+        Drops all responses cached for token, e.g. after it was used to create a VM
+        """
+        with self.lock:
+            self.generations[token] = self.generations.get(token, 0) + 1
+
+    def stats(self):
+        """
+        :return: dict with number of hits, misses, cached responses, hit rate,
+                 number of 304 responses and bytes they saved
+        """
+        with self.lock:
+            return dict(self.cache.stats(), revalidated=self.revalidated, bytes_saved=self.bytes_saved)
+
+
+# Responses to all WaldurConnections in this process
+response_cache = ResponseCache()
+
+
+def with_fields(parameters, fields):
+    """
+    :param parameters: query parameters of a request to Waldur API
+    :param fields: names of the fields of returned objects to include, None for all fields
+    :return: parameters with Waldur's field parameter for every field, so other fields are not sent
+    """
+    if not fields:
+        return parameters
+    return dict(parameters or {}, field=list(fields))
+
+
+def next_page_parameters(response):
+    """
+    :param response: response of Waldur API to a list request
+    :return: query parameters of the next page from the Link header, None if this is the last page
+    """
+    link = response.links.get('next')
+    if link is None:
+        return None
+    return {key: values[0] if len(values) == 1 else values
+            for key, values in parse_qs(urlsplit(link['url']).query).items()}
+
+
 class WaldurConnection(object):
     """
     Class for querying Waldur API
@@ -164,15 +411,70 @@ class WaldurConnection(object):
 
         self.api_url = api_url
         self.token = token.strip()
-        self.session = Session()
+        self.session = sessions.get(api_url)
+
+    def iterate(self, method, parameters, endpoint, data=None, prefetch=False):
+        """
+        Items of all pages of a list endpoint, pages are queried as the items are consumed
+        by following the next page links Waldur sends in the Link header.
+        At most one page is held in memory, two with prefetch.
+        :param prefetch: if True, the next page is queried in a thread while the items of the current page are consumed
+        :return: generator of items
+        """
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        pending = None
+        try:
+            page, next_parameters = self._send(method=method, parameters=parameters, endpoint=endpoint, data=data)
+            while True:
+                pending = None
+                if next_parameters is not None and executor is not None:
+                    pending = executor.submit(
+                        self._send, method=method, parameters=next_parameters, endpoint=endpoint, data=data
+                    )
+
+                yield from page
+
+                if next_parameters is None:
+                    return
+                if pending is not None:
+                    page, next_parameters = pending.result()
+                else:
+                    page, next_parameters = self._send(
+                        method=method, parameters=next_parameters, endpoint=endpoint, data=data
+                    )
+        finally:
+            # page prefetched for a consumer that stopped early is not needed, if it has not been queried yet
+            if pending is not None:
+                pending.cancel()
+            if executor is not None:
+                executor.shutdown(wait=False)
 
     def query(self, method, parameters, endpoint, data=None):
+        """
+        :return: response of Waldur API, the first page of a list endpoint, see iterate for all pages
+        """
+        return self._send(method=method, parameters=parameters, endpoint=endpoint, data=data)[0]
+
+    def _send(self, method, parameters, endpoint, data=None):
+        """
+        :return: (response of Waldur API, parameters of the next page or None if this is the last or only page)
+        """
         if endpoint[-1] != '/':
             endpoint += '/'
 
         if data is None:
             data = []
 
+        ttl = response_cache.ttl(endpoint) if method == 'GET' else None
+        validated = None
+        if ttl is not None:
+            key = response_cache.key(self.token, self.api_url + endpoint, parameters)
+            cached = response_cache.get(key)
+            if cached is not None:
+                log.debug(f"Cached response to GET {endpoint}, {response_cache.stats()}")
+                return cached
+            validated = response_cache.get_validated(key)
+
         request = Request(
             method=method,
             url=self.api_url + endpoint,
@@ -183,12 +485,25 @@ class WaldurConnection(object):
         prepped = request.prepare()
         prepped.headers['Content-Type'] = 'application/json'
         prepped.headers['Authorization'] = 'token ' + self.token
+        if validated is not None:
+            prepped.headers.update(validated.validators)
         response = self.session.send(prepped)
 
+        if response.status_code == 304 and validated is not None:
+            response_cache.not_modified(key, validated, ttl)
+            log.debug(f"GET {endpoint} not modified, {response_cache.stats()}")
+            return validated.body, validated.next_page
+
         response_json = response.json()
 
         if response.status_code in range(200, 300):
-            return response_json
+            next_page = next_page_parameters(response)
+            if ttl is not None:
+                response_cache.put(key, (response_json, next_page), ttl)
+                response_cache.put_validated(key, response_json, next_page, response.headers, len(response.content))
+            elif method != 'GET':
+                response_cache.invalidate(self.token)
+            return response_json, next_page
         elif response.status_code == 401:
             raise InvalidTokenError()
         else:
@@ -1,11 +1,20 @@
+import json
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from threading import Thread
 from unittest import TestCase, main, mock
-from ..request import BackendConnection, InvalidTokenError, WaldurConnection
+from urllib.parse import urlsplit, parse_qs
+from ..cache import LRUCache
+from ..request import BackendConnection, InvalidTokenError, WaldurConnection, SessionPool, sessions, with_fields, \
+    response_cache, DEFAULT_TTLS
 
 
 class MockResponse:
-    def __init__(self, data, code):
+    def __init__(self, data, code, links=None, headers=None):
         self.data = data
         self.status_code = code
+        self.links = links or {}
+        self.headers = headers or {}
+        self.content = json.dumps(data).encode()
 
     def json(self):
         return self.data
@@ -90,6 +99,321 @@ class WaldurConnectionTests(TestCase):
         # assert that message is added to exception from response
         self.assertTrue("System error" in str(context.exception))
 
+    @mock.patch('requests.Session.send', side_effect=send_ok)
+    def test_query_with_fields(self, mock_send):
+        self.conn.query("GET", with_fields({"page_size": 100}, ["name", "uuid"]), "test")
+        self.assertEqual(
+            "https://url.api/test/?page_size=100&field=name&field=uuid",
+            mock_send.call_args[0][0].url
+        )
+
+    def test_with_fields(self):
+        self.assertEqual({"field": ["name"]}, with_fields(None, ["name"]))
+        self.assertEqual({"page_size": 10}, with_fields({"page_size": 10}, None))
+
+
+def send_pages(request, *args, **kwargs):
+    """
+    Three pages of two items, like Waldur API pages lists
+    """
+    page = int(parse_qs(urlsplit(request.url).query).get('page', ['1'])[0])
+    links = {}
+    if page < 3:
+        links['next'] = {'url': f"https://url.api/test/?page={page + 1}&page_size=2", 'rel': 'next'}
+    return MockResponse([{"id": 2 * page - 1}, {"id": 2 * page}], 200, links)
+
+
+class PaginationTests(TestCase):
+
+    def setUp(self):
+        self.conn = WaldurConnection("https://url.api", "test token")
+
+    @mock.patch('requests.Session.send', side_effect=send_pages)
+    def test_iterate_follows_next_links(self, mock_send):
+        items = list(self.conn.iterate("GET", {"page_size": 2}, "test"))
+
+        self.assertEqual([1, 2, 3, 4, 5, 6], [item["id"] for item in items])
+        self.assertEqual(3, mock_send.call_count)
+        self.assertIn("page=3", mock_send.call_args[0][0].url)
+
+    @mock.patch('requests.Session.send', side_effect=send_pages)
+    def test_iterate_queries_pages_as_items_are_consumed(self, mock_send):
+        items = self.conn.iterate("GET", {"page_size": 2}, "test")
+        self.assertEqual(0, mock_send.call_count)
+
+        next(items)
+        next(items)
+        self.assertEqual(1, mock_send.call_count)
+
+        next(items)
+        self.assertEqual(2, mock_send.call_count)
+
+    @mock.patch('requests.Session.send', side_effect=send_pages)
+    def test_iterate_with_prefetch(self, mock_send):
+        items = list(self.conn.iterate("GET", {"page_size": 2}, "test", prefetch=True))
+        self.assertEqual([1, 2, 3, 4, 5, 6], [item["id"] for item in items])
+
+    @mock.patch('requests.Session.send', side_effect=send_pages)
+    def test_queries_between_pages_do_not_change_paging(self, mock_send):
+        items = self.conn.iterate("GET", {"page_size": 2}, "test", prefetch=True)
+        ids = []
+        for item in items:
+            ids.append(item["id"])
+            self.conn.query("GET", {"page": 3, "page_size": 2}, "test")
+
+        self.assertEqual([1, 2, 3, 4, 5, 6], ids)
+
+    @mock.patch('requests.Session.send', side_effect=send_ok)
+    def test_query_without_next_link_is_last_page(self, mock_send):
+        self.assertEqual([{"data": "ok"}], list(self.conn.iterate("GET", {}, "test")))
+        self.assertEqual(1, mock_send.call_count)
+
+
+class ResponseCacheTests(TestCase):
+
+    def setUp(self):
+        response_cache.configure(maxsize=16)
+        self.conn = WaldurConnection("https://url.api", "test token")
+
+    def tearDown(self):
+        response_cache.configure(maxsize=1024, ttls=DEFAULT_TTLS)
+
+    @mock.patch('requests.Session.send', side_effect=send_ok)
+    def test_get_is_cached(self, mock_send):
+        self.assertEqual([{"data": "ok"}], self.conn.query("GET", {"page_size": 100}, "customers"))
+        self.assertEqual([{"data": "ok"}], self.conn.query("GET", {"page_size": 100}, "customers/"))
+
+        self.assertEqual(1, mock_send.call_count)
+        self.assertEqual(1, response_cache.stats()['hits'])
+
+    @mock.patch('requests.Session.send', side_effect=send_ok)
+    def test_cache_is_per_token_and_parameters(self, mock_send):
+        self.conn.query("GET", {"page_size": 100}, "customers")
+        self.conn.query("GET", {"page_size": 10}, "customers")
+        WaldurConnection("https://url.api", "other token").query("GET", {"page_size": 100}, "customers")
+
+        self.assertEqual(3, mock_send.call_count)
+
+    @mock.patch('requests.Session.send', side_effect=send_ok)
+    def test_endpoints_without_ttl_are_not_cached(self, mock_send):
+        self.conn.query("GET", {}, "events")
+        self.conn.query("GET", {}, "events")
+
+        self.assertEqual(2, mock_send.call_count)
+
+    @mock.patch('requests.Session.send', side_effect=send_ok)
+    def test_post_invalidates_token(self, mock_send):
+        other = WaldurConnection("https://url.api", "other token")
+        self.conn.query("GET", {}, "openstacktenant-instances")
+        other.query("GET", {}, "openstacktenant-instances")
+
+        self.conn.query("POST", [], "openstacktenant-instances", data={"name": "vm"})
+        self.conn.query("GET", {}, "openstacktenant-instances")
+        other.query("GET", {}, "openstacktenant-instances")
+
+        self.assertEqual(4, mock_send.call_count)
+
+    @mock.patch('requests.Session.send', side_effect=send_ok)
+    def test_responses_expire(self, mock_send):
+        response_cache.configure(ttls={'customers': 0})
+        self.conn.query("GET", {}, "customers")
+        self.conn.query("GET", {}, "customers")
+
+        self.assertEqual(2, mock_send.call_count)
+
+    @mock.patch('requests.Session.send', side_effect=send_invalid_token)
+    def test_errors_are_not_cached(self, mock_send):
+        for _ in range(2):
+            with self.assertRaises(InvalidTokenError):
+                self.conn.query("GET", {}, "customers")
+
+        self.assertEqual(2, mock_send.call_count)
+
+
+def send_with_etag(request, *args, **kwargs):
+    if request.headers.get('If-None-Match') == '"v1"':
+        return MockResponse(None, 304)
+    return MockResponse([{"data": "ok"}], 200, headers={'ETag': '"v1"'})
+
+
+def send_with_last_modified(request, *args, **kwargs):
+    if request.headers.get('If-Modified-Since') == 'Mon, 01 Jan 2018 00:00:00 GMT':
+        return MockResponse(None, 304)
+    return MockResponse([{"data": "ok"}], 200, headers={'Last-Modified': 'Mon, 01 Jan 2018 00:00:00 GMT'})
+
+
+class ConditionalRequestTests(TestCase):
+
+    def setUp(self):
+        # responses expire at once, so every query is sent
+        response_cache.configure(maxsize=16, ttls={'customers': 0})
+        self.conn = WaldurConnection("https://url.api", "test token")
+
+    def tearDown(self):
+        response_cache.configure(maxsize=1024, ttls=DEFAULT_TTLS)
+
+    @mock.patch('requests.Session.send', side_effect=send_with_etag)
+    def test_not_modified_response_is_served_from_cache(self, mock_send):
+        self.assertEqual([{"data": "ok"}], self.conn.query("GET", {}, "customers"))
+        self.assertEqual([{"data": "ok"}], self.conn.query("GET", {}, "customers"))
+
+        self.assertEqual(2, mock_send.call_count)
+        self.assertEqual('"v1"', mock_send.call_args[0][0].headers['If-None-Match'])
+        stats = response_cache.stats()
+        self.assertEqual(1, stats['revalidated'])
+        self.assertEqual(len(b'[{"data": "ok"}]'), stats['bytes_saved'])
+
+    @mock.patch('requests.Session.send', side_effect=send_with_last_modified)
+    def test_last_modified(self, mock_send):
+        self.conn.query("GET", {}, "customers")
+        self.assertEqual([{"data": "ok"}], self.conn.query("GET", {}, "customers"))
+        self.assertEqual(1, response_cache.stats()['revalidated'])
+
+    @mock.patch('requests.Session.send', side_effect=send_ok)
+    def test_no_validators_no_conditional_request(self, mock_send):
+        self.conn.query("GET", {}, "customers")
+        self.conn.query("GET", {}, "customers")
+
+        self.assertNotIn('If-None-Match', mock_send.call_args[0][0].headers)
+        self.assertNotIn('If-Modified-Since', mock_send.call_args[0][0].headers)
+
+    @mock.patch('requests.Session.send', side_effect=send_with_etag)
+    def test_invalidated_responses_are_not_revalidated(self, mock_send):
+        self.conn.query("GET", {}, "customers")
+        response_cache.invalidate("test token")
+        self.conn.query("GET", {}, "customers")
+
+        self.assertNotIn('If-None-Match', mock_send.call_args[0][0].headers)
+        self.assertEqual(0, response_cache.stats()['revalidated'])
+
+
+class MockWaldurHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    cookies = []
+
+    def do_GET(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        MockWaldurHandler.cookies.append(self.headers.get('Cookie'))
+        body = b'[{"data": "ok"}]'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Set-Cookie', 'sessionid=' + self.headers.get('Authorization', '').split()[-1])
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SessionPoolTests(TestCase):
+
+    def setUp(self):
+        sessions.clear()
+
+    def tearDown(self):
+        sessions.configure(pool_size=10, block=False)
+
+    def test_connections_to_same_api_share_session(self):
+        first = WaldurConnection("https://url.api", "token")
+        second = WaldurConnection("https://url.api/", "other token")
+        other = WaldurConnection("https://other.api", "token")
+
+        self.assertIs(first.session, second.session)
+        self.assertIsNot(first.session, other.session)
+
+    def test_configure_limits_connections_per_host(self):
+        sessions.configure(pool_size=2, block=True)
+        adapter = WaldurConnection("https://url.api", "token").session.get_adapter("https://url.api/")
+
+        self.assertEqual(2, adapter._pool_maxsize)
+        self.assertTrue(adapter._pool_block)
+
+    def test_configure_closes_sessions(self):
+        session = WaldurConnection("https://url.api", "token").session
+        sessions.configure(pool_size=4)
+        self.assertIsNot(session, WaldurConnection("https://url.api", "token").session)
+
+    def test_connection_is_reused(self):
+        server = HTTPServer(('127.0.0.1', 0), MockWaldurHandler)
+        Thread(target=server.serve_forever, daemon=True).start()
+        api_url = f"http://127.0.0.1:{server.server_port}/"
+
+        try:
+            pool = SessionPool()
+            for _ in range(3):
+                connection = WaldurConnection(api_url, "token")
+                connection.session = pool.get(api_url)
+                self.assertEqual([{"data": "ok"}], connection.query("GET", {}, "test"))
+
+            self.assertEqual({'requests': 3, 'connections': 1, 'reused': 2}, pool.stats()[api_url])
+            pool.clear()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_cookies_are_not_shared(self):
+        server = HTTPServer(('127.0.0.1', 0), MockWaldurHandler)
+        Thread(target=server.serve_forever, daemon=True).start()
+        api_url = f"http://127.0.0.1:{server.server_port}/"
+        MockWaldurHandler.cookies = []
+
+        try:
+            for token in ["first token", "second token"]:
+                WaldurConnection(api_url, token).query("GET", {}, "test")
+
+            self.assertEqual([None, None], MockWaldurHandler.cookies)
+            self.assertEqual(0, len(sessions.get(api_url).cookies))
+        finally:
+            sessions.clear()
+            server.shutdown()
+            server.server_close()
+
+
+class LRUCacheTests(TestCase):
+
+    def setUp(self):
+        self.cache = LRUCache(2)
+
+    def test_items_expire(self):
+        self.cache.put("a", 1, ttl=60)
+        self.cache.put("b", 2, ttl=0)
+
+        self.assertEqual(1, self.cache.get("a"))
+        self.assertIsNone(self.cache.get("b"))
+        self.assertNotIn("b", self.cache)
+
+    def test_evicts_least_recently_used(self):
+        self.cache.put("a", 1)
+        self.cache.put("b", 2)
+        self.cache.get("a")
+        self.cache.put("c", 3)
+
+        self.assertIn("a", self.cache)
+        self.assertNotIn("b", self.cache)
+        self.assertEqual(3, self.cache.get("c"))
+
+    def test_stats(self):
+        self.cache.put("a", 1)
+        self.cache.get("a")
+        self.cache.get("b")
+
+        self.assertEqual({'hits': 1, 'misses': 1, 'size': 1, 'hit_rate': 0.5}, self.cache.stats())
+
+    def test_value_computed_before_clear_is_not_cached(self):
+        version = self.cache.version
+        self.cache.clear()
+        self.cache.put("a", 1, version=version)
+
+        self.assertNotIn("a", self.cache)
+
+    def test_size_zero_disables_cache(self):
+        cache = LRUCache(0)
+        cache.put("a", 1)
+
+        self.assertIsNone(cache.get("a"))
+
 
 if __name__ == '__main__':
     main()